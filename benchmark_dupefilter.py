@@ -0,0 +1,151 @@
+"""
+Speicher-Benchmark für Dupefilter und Request-Warteschlange.
+
+Vergleicht den Speicherbedarf in Abhängigkeit von der Anzahl URLs:
+- Dupefilter: Fingerprint-Set (Scrapy-Standard) vs. ScalableBloomFilter
+- Warteschlange: Speicher-Queue (Scrapy-Standard ohne JOBDIR) vs. Disk-Queue
+
+Gemessen wird der maximale Python-Speicher (tracemalloc) während des
+Befüllens; die Laufzeit wird in einem zweiten Durchlauf ohne tracemalloc
+gemessen. Für den Bloom-Filter wird zusätzlich die tatsächliche
+Falsch-Positiv-Rate mit ebenso vielen unbekannten URLs bestimmt.
+
+Kapazität und Fehlerrate des Bloom-Filters stammen aus settings.py
+(BLOOM_DUPEFILTER_CAPACITY, BLOOM_DUPEFILTER_ERROR_RATE), sodass die
+Messung dem konfigurierten Dupefilter entspricht.
+
+Verwendung:
+    python benchmark_dupefilter.py
+    python benchmark_dupefilter.py --sizes 10000 100000 --error-rate 0.001 --capacity 10000
+
+Hinweis:
+    - 1.000.000 URLs dauern einige Minuten (reines Python)
+    - Die Speicher-Queue braucht bei 1.000.000 URLs mehrere GB RAM,
+      mit --no-queue wird dieser Teil übersprungen
+"""
+
+import argparse
+import tempfile
+import time
+import tracemalloc
+
+from scrapy import Request
+from scrapy.squeues import LifoMemoryQueue, PickleLifoDiskQueue
+from scrapy.utils.project import get_project_settings
+from scrapy.utils.request import RequestFingerprinter
+from scrapy.utils.test import get_crawler
+
+from scrape_bibliotheken.bloom import ScalableBloomFilter
+
+
+def make_urls(count, offset=0):
+    """Erzeugt realistische, eindeutige Bibliotheks-URLs."""
+    for i in range(offset, offset + count):
+        yield f"https://www.stadtbibliothek-{i % 20000}.de/service/seite-{i}.html"
+
+
+def measure(fill, timed=True):
+    """
+    Führt fill() aus und misst maximalen Speicher und Laufzeit.
+
+    Args:
+        fill: Funktion, die die Datenstruktur befüllt und zurückgibt
+        timed (bool): Zusätzlich die Laufzeit ohne tracemalloc messen
+
+    Returns:
+        tuple: (Ergebnis von fill, Spitzen-Speicher in MB, Laufzeit in Sekunden)
+    """
+    tracemalloc.start()
+    fill()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    elapsed = float("nan")
+    start = time.perf_counter()
+    result = fill()
+    if timed:
+        elapsed = time.perf_counter() - start
+    return result, peak / 1024 ** 2, elapsed
+
+
+def bench_dupefilter(count, fingerprints, capacity, error_rate):
+    """Vergleicht Fingerprint-Set und Bloom-Filter (Startkapazität capacity) für count URLs."""
+    def fill_set():
+        seen = set()
+        for fp in fingerprints:
+            seen.add(fp)
+        return seen
+
+    def fill_bloom():
+        bloom = ScalableBloomFilter(capacity, error_rate)
+        for fp in fingerprints:
+            bloom.add(fp)
+        return bloom
+
+    _, set_mb, set_s = measure(fill_set)
+    bloom, bloom_mb, bloom_s = measure(fill_bloom)
+
+    # Tatsächliche Falsch-Positiv-Rate mit unbekannten URLs
+    fingerprinter = RequestFingerprinter()
+    false_positives = sum(
+        fingerprinter.fingerprint(Request(url)) in bloom
+        for url in make_urls(count, offset=count)
+    )
+    return set_mb, set_s, bloom_mb, bloom_s, false_positives / count
+
+
+def bench_queue(count):
+    """Vergleicht Speicher- und Disk-Queue für count Requests."""
+    crawler = get_crawler()
+
+    def fill_memory():
+        queue = LifoMemoryQueue.from_crawler(crawler)
+        for url in make_urls(count):
+            queue.push(Request(url))
+        return queue
+
+    with tempfile.TemporaryDirectory() as path:
+        def fill_disk():
+            queue = PickleLifoDiskQueue.from_crawler(crawler, key=path + "/q")
+            for url in make_urls(count):
+                queue.push(Request(url))
+            queue.close()
+            return queue
+
+        _, disk_mb, _ = measure(fill_disk, timed=False)
+    _, memory_mb, _ = measure(fill_memory, timed=False)
+    return memory_mb, disk_mb
+
+
+def main():
+    """Kommandozeilen-Einstiegspunkt."""
+    settings = get_project_settings()
+    parser = argparse.ArgumentParser(description="Speicher-Benchmark für Dupefilter und Warteschlange.")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10000, 100000, 1000000],
+                        help="Anzahl URLs pro Messung (Standard: 10000 100000 1000000)")
+    parser.add_argument("--capacity", type=int,
+                        default=settings.getint("BLOOM_DUPEFILTER_CAPACITY", 100000),
+                        help="Startkapazität des Bloom-Filters (Standard: BLOOM_DUPEFILTER_CAPACITY)")
+    parser.add_argument("--error-rate", type=float,
+                        default=settings.getfloat("BLOOM_DUPEFILTER_ERROR_RATE", 0.0001),
+                        help="Falsch-Positiv-Rate des Bloom-Filters (Standard: BLOOM_DUPEFILTER_ERROR_RATE)")
+    parser.add_argument("--no-queue", action="store_true", help="Warteschlangen-Messung überspringen")
+    args = parser.parse_args()
+
+    fingerprinter = RequestFingerprinter()
+    print(f"Bloom-Filter: Startkapazität {args.capacity}, Fehlerrate {args.error_rate}")
+    print(f"{'URLs':>9} | {'Set MB':>8} | {'Bloom MB':>8} | {'FP-Rate':>9} | "
+          f"{'Set s':>6} | {'Bloom s':>7} | {'Mem-Queue MB':>12} | {'Disk-Queue MB':>13}")
+    for count in args.sizes:
+        fingerprints = [fingerprinter.fingerprint(Request(url)) for url in make_urls(count)]
+        set_mb, set_s, bloom_mb, bloom_s, fp_rate = bench_dupefilter(
+            count, fingerprints, args.capacity, args.error_rate
+        )
+        del fingerprints
+        memory_mb, disk_mb = (float("nan"), float("nan")) if args.no_queue else bench_queue(count)
+        print(f"{count:>9} | {set_mb:>8.2f} | {bloom_mb:>8.2f} | {fp_rate:>9.6f} | "
+              f"{set_s:>6.2f} | {bloom_s:>7.2f} | {memory_mb:>12.1f} | {disk_mb:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+Prüfung des verteilten keyword_spider-Crawls mit mehreren lokalen Prozessen.
+
+Startet einen lokalen HTTP-Server mit einer Test-Bibliotheksseite, die unter
+mehreren Loopback-Hosts (127.0.0.1, 127.0.0.2, ...) erreichbar ist, crawlt
+diese Websites mit n parallelen keyword_spider-Prozessen (shard=i/n) und
+führt die Ergebnisse wie merge_shards.py zusammen.
+
+Geprüft wird:
+- Jeder Shard crawlt nur die Websites, die ihm per Hash zugeordnet sind
+- Die zusammengeführte Liste enthält jede Website genau einmal, in der
+  Reihenfolge der Konfiguration, mit den erwarteten gefundenen URLs
+- Varianten derselben URL (z.B. mit/ohne abschließenden Slash) werden beim
+  Zusammenführen de-dupliziert
+- Die Ergebnisdatenbank liefert den ganzen Crawl (alle Shards) mit
+  denselben Einträgen in derselben Reihenfolge wie die zusammengeführte Datei
+
+Verwendung:
+    python check_sharding.py
+    python check_sharding.py --shards 4 --sites 12
+
+Hinweis:
+    - Benötigt Loopback-Adressen 127.0.0.x (unter Linux standardmäßig vorhanden)
+    - Das Skript endet mit Exit-Code 1, wenn eine Prüfung fehlschlägt
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from merge_shards import merge_shard_files
+from scrape_bibliotheken.sharding import merge_results, shard_for_url
+from scrape_bibliotheken.store import ResultStore
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Testseite mit einem Link, den der keyword_spider findet, und einem, den er ignoriert
+INDEX_HTML = """<html><body>
+<a href="/anmeldung.html">Anmeldung</a>
+<a href="/impressum.html">Impressum</a>
+</body></html>
+"""
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    """Request-Handler ohne Zugriffslog auf der Konsole."""
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(directory):
+    """
+    Startet einen lokalen HTTP-Server in einem Hintergrund-Thread.
+
+    Args:
+        directory (str): Das auszuliefernde Verzeichnis
+
+    Returns:
+        ThreadingHTTPServer: Der laufende Server (Port in server_address[1])
+    """
+    server = ThreadingHTTPServer(("", 0), partial(QuietHandler, directory=directory))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_shards(config_file, count, workdir):
+    """
+    Startet count keyword_spider-Prozesse parallel und wartet auf alle.
+
+    Args:
+        config_file (str): Pfad zur Konfiguration mit den Websites
+        count (int): Anzahl Shards
+        workdir (str): Verzeichnis für Ausgaben und Circuit-Breaker-Dateien
+
+    Returns:
+        list: Pfade zu den JSON-Ausgaben der Shards
+
+    Raises:
+        RuntimeError: Wenn ein Prozess mit Fehler endet
+    """
+    outputs, processes = [], []
+    for index in range(count):
+        output = os.path.join(workdir, f"urls_shard_{index}.json")
+        outputs.append(output)
+        processes.append(subprocess.Popen(
+            [
+                sys.executable, "-m", "scrapy", "crawl", "keyword_spider",
+                "-a", f"config_file={config_file}",
+                "-a", f"shard={index}/{count}",
+                "-O", output,
+                "-s", f"CIRCUIT_BREAKER_FILE={os.path.join(workdir, 'dead_hosts.json')}",
+                "-s", f"RESULTS_DB={os.path.join(workdir, 'results.db')}",
+                "-s", "RESULTS_DB_CRAWL=check",
+                "-s", "LOG_LEVEL=WARNING",
+            ],
+            cwd=PROJECT_DIR,
+        ))
+    for index, process in enumerate(processes):
+        if process.wait() != 0:
+            raise RuntimeError(f"Shard {index}/{count} exited with code {process.returncode}.")
+    return outputs
+
+
+def check(shards, sites):
+    """
+    Führt den verteilten Crawl aus und prüft das Ergebnis.
+
+    Args:
+        shards (int): Anzahl paralleler Prozesse
+        sites (int): Anzahl Test-Websites (Loopback-Hosts)
+
+    Returns:
+        list: Beschreibung aller fehlgeschlagenen Prüfungen (leer = alles in Ordnung)
+    """
+    errors = []
+
+    # Kanonische De-Duplizierung ohne Netzwerk
+    variants = merge_results(
+        [[{"source_url": "https://x.de", "matched_urls": ["a"]}],
+         [{"source_url": "https://x.de/", "matched_urls": ["b"]}]],
+        ["https://x.de/"],
+    )
+    if len(variants) != 1:
+        errors.append(f"URL variants not de-duplicated: {variants}")
+
+    with tempfile.TemporaryDirectory(prefix="check_sharding-") as workdir:
+        with open(os.path.join(workdir, "index.html"), "w", encoding="utf-8") as f:
+            f.write(INDEX_HTML)
+        server = start_server(workdir)
+        port = server.server_address[1]
+
+        websites = [f"http://127.0.0.{i + 1}:{port}/" for i in range(sites)]
+        config_file = os.path.join(workdir, "bibliotheken.json")
+        with open(config_file, "w", encoding="utf-8") as f:
+            json.dump([{"name": f"Bibliothek {i}", "website": url} for i, url in enumerate(websites)], f)
+
+        try:
+            outputs = run_shards(config_file, shards, workdir)
+        finally:
+            server.shutdown()
+
+        for index, output in enumerate(outputs):
+            with open(output, "r", encoding="utf-8") as f:
+                for entry in json.load(f):
+                    if shard_for_url(entry["source_url"], shards) != index:
+                        errors.append(f"Shard {index} crawled foreign site {entry['source_url']}")
+
+        merged = merge_shard_files(outputs, config_file)
+        sources = [entry["source_url"] for entry in merged]
+        if sources != websites:
+            errors.append(f"Merged sites {sources} != configured sites {websites}")
+        for entry in merged:
+            expected = [entry["source_url"] + "anmeldung.html"]
+            if entry["matched_urls"] != expected:
+                errors.append(f"{entry['source_url']}: matched {entry['matched_urls']}, expected {expected}")
+
+        store = ResultStore(os.path.join(workdir, "results.db"))
+        from_db = store.matched_urls(start_urls=websites)
+        store.close()
+        if from_db != merged:
+            errors.append(f"Database crawl {from_db} != merged output {merged}")
+
+        print(f"{len(merged)} Websites aus {shards} Shards zusammengeführt")
+        for index, output in enumerate(outputs):
+            with open(output, "r", encoding="utf-8") as f:
+                print(f"  Shard {index}: {len(json.load(f))} Websites")
+    return errors
+
+
+def main():
+    """Kommandozeilen-Einstiegspunkt."""
+    parser = argparse.ArgumentParser(description="Prüft einen verteilten keyword_spider-Crawl mit lokalen Prozessen.")
+    parser.add_argument("--shards", type=int, default=3, help="Anzahl paralleler Prozesse (Standard: 3)")
+    parser.add_argument("--sites", type=int, default=9, help="Anzahl Test-Websites (Standard: 9)")
+    args = parser.parse_args()
+
+    errors = check(args.shards, args.sites)
+    for error in errors:
+        print(f"❌ {error}")
+    if errors:
+        sys.exit(1)
+    print("✅ Verteilter Crawl korrekt zusammengeführt!")
+
+
+if __name__ == "__main__":
+    main()
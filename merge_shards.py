@@ -0,0 +1,78 @@
+"""
+Zusammenführen der Ergebnisse eines verteilten keyword_spider-Crawls.
+
+Bei einem verteilten Crawl schreibt jeder Shard (shard=i/n) eine eigene
+JSON-Datei. Dieses Skript führt die Dateien zu einer urls.json zusammen:
+- Doppelte Einträge (gleiche kanonische source_url) werden entfernt
+- Doppelte URLs innerhalb von matched_urls werden entfernt
+- Die Reihenfolge entspricht der ursprünglichen Reihenfolge in bibliotheken.json
+
+Eingabe: urls_shard_*.json (je Shard eine Datei), bibliotheken.json
+Ausgabe: urls.json
+
+Verwendung:
+    python -m scrapy crawl keyword_spider -a shard=0/2 -s RESULTS_DB_CRAWL=2026-10 -o urls_shard_0.json
+    python -m scrapy crawl keyword_spider -a shard=1/2 -s RESULTS_DB_CRAWL=2026-10 -o urls_shard_1.json
+    python merge_shards.py urls_shard_0.json urls_shard_1.json -o urls.json
+"""
+
+import argparse
+import json
+
+from scrape_bibliotheken.sharding import merge_results
+
+
+def load_start_urls(config_file):
+    """
+    Lädt die Website-URLs in ihrer ursprünglichen Reihenfolge.
+
+    Args:
+        config_file (str): Pfad zur bibliotheken.json
+
+    Returns:
+        list: Website-URLs ohne leere Einträge
+    """
+    with open(config_file, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    return [entry["website"] for entry in config if entry.get("website")]
+
+
+def merge_shard_files(shard_files, config_file):
+    """
+    Liest alle Shard-Dateien und führt sie zusammen.
+
+    Args:
+        shard_files (list): Pfade zu den JSON-Dateien der einzelnen Shards
+        config_file (str): Pfad zur bibliotheken.json (für die Reihenfolge)
+
+    Returns:
+        list: Zusammengeführte Einträge mit 'source_url' und 'matched_urls'
+    """
+    shard_results = []
+    for path in shard_files:
+        with open(path, "r", encoding="utf-8") as f:
+            shard_results.append(json.load(f))
+    return merge_results(shard_results, load_start_urls(config_file))
+
+
+def main():
+    """Kommandozeilen-Einstiegspunkt."""
+    parser = argparse.ArgumentParser(description="Führt die urls.json-Dateien mehrerer Shards zusammen.")
+    parser.add_argument("shard_files", nargs="+", help="JSON-Ausgaben der einzelnen Shards")
+    parser.add_argument("-o", "--output", default="urls.json", help="Zieldatei (Standard: urls.json)")
+    parser.add_argument("-c", "--config", default="bibliotheken.json", help="Konfigurationsdatei des keyword_spider")
+    args = parser.parse_args()
+
+    merged = merge_shard_files(args.shard_files, args.config)
+
+    # Gleiches Format wie der Scrapy-JSON-Export: ein Eintrag pro Zeile
+    with open(args.output, "w", encoding="utf-8") as f:
+        f.write("[\n")
+        f.write(",\n".join(json.dumps(entry, ensure_ascii=False) for entry in merged))
+        f.write("\n]\n")
+
+    print(f"✅ {len(merged)} Einträge aus {len(args.shard_files)} Shards in '{args.output}' geschrieben!")
+
+
+if __name__ == "__main__":
+    main()
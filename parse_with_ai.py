@@ -1,38 +1,74 @@
 """
 AI-gestützte Analyse von Bibliothekswebseiten.
 
-Dieses Skript verwendet ein AI-Modell (über g4f), um die von keyword_spider
+Dieses Skript verwendet AI-Modelle (über g4f oder einen lokalen Server), um die von keyword_spider
 gesammelten URLs zu analysieren und wichtige Informationen zu extrahieren:
 - Online vs. Offline Anmeldung
 - Kosten des Bibliotheksausweises
 - Weitere relevante Informationen (z.B. Wohnsitzanforderungen)
 
-Eingabe: urls.json (von keyword_spider generiert)
+Eingabe: letzter keyword_spider-Lauf aus results.db, sonst urls.json
 Ausgabe: libraries.md (strukturierte Markdown-Datei mit Ergebnissen)
+         results.db (Tabelle analyses, ein neuer parse_with_ai-Lauf)
+         ai_stats.json (Latenz- und Fehlerstatistik pro AI-Backend)
 
 Voraussetzungen:
     - g4f Python-Paket (pip install g4f)
-    - urls.json im aktuellen Verzeichnis
+    - numpy und scipy für das Ranking der Seiten (pip install numpy scipy)
+    - results.db oder urls.json im aktuellen Verzeichnis
     - Internetverbindung für AI-Modell-Zugriff
 
 Verwendung:
     python parse_with_ai.py
 
 Hinweis: 
+    - Vor der Analyse werden die Seiten jeder Bibliothek geladen und per BM25
+      bewertet; nur die TOP_K besten Seiten gehen in den Prompt
     - Das Skript nutzt Web-Suche für bessere Ergebnisse
+    - Anfragen werden über mehrere Backends verteilt (AI_BACKENDS, siehe
+      scrape_bibliotheken/ai_router.py): Rate-Limits pro Backend, Hedged
+      Requests bei langsamen Antworten, Circuit-Breaker für ausgefallene Backends
     - Jede Bibliothek wird einzeln verarbeitet (kann dauern)
     - Bei Fehlern wird eine Fehlermeldung ausgegeben, aber die Verarbeitung fortgesetzt
 """
 
 import requests, json
-from g4f.client import Client
+
+from scrape_bibliotheken.ai_router import AIRouter, build_backends
+from scrape_bibliotheken.ranking import rank_libraries
+from scrape_bibliotheken.store import ResultStore, domain_of, now, parse_answer
+
+# Anzahl Seiten pro Bibliothek, die an das AI-Modell übergeben werden
+TOP_K = 5
+
+# Ergebnisdatenbank (siehe scrape_bibliotheken/store.py); ohne keyword_spider-Lauf wird urls.json gelesen
+RESULTS_DB = "results.db"
+
+# AI-Backends in Prioritätsreihenfolge
+# type: "g4f" (Modelle über g4f) oder "local" (lokaler OpenAI-kompatibler Server, z.B. Ollama)
+# rate_per_minute/burst: Token-Bucket pro Backend
+# failure_threshold/cooldown: Circuit-Breaker (Fehler in Folge, Sperrzeit in Sekunden)
+# timeout: Maximale Dauer einer Anfrage in Sekunden (Standard: 120), danach zählt sie als Fehler
+AI_BACKENDS = [
+    {"type": "g4f", "name": "g4f-gpt-4o-mini", "model": "gpt-4o-mini", "rate_per_minute": 20},
+    {"type": "g4f", "name": "g4f-deepseek-v3", "model": "deepseek-v3", "rate_per_minute": 10},
+    {"type": "local", "name": "local-llama3.1", "model": "llama3.1",
+     "url": "http://localhost:11434/v1/chat/completions", "rate_per_minute": 60},
+]
+
+# Wird ein Backend langsamer als seine p95-Latenz, wird das nächste parallel gefragt;
+# bis genug Messwerte vorliegen, gilt dieser Wert (Sekunden)
+HEDGE_AFTER = 60
+
+router = AIRouter(build_backends(AI_BACKENDS), hedge_after=HEDGE_AFTER)
 
 def get_answer(text):
     """
-    Sendet eine Anfrage an das AI-Modell und erhält eine Antwort.
+    Sendet eine Anfrage an die AI-Backends und erhält eine Antwort.
     
-    Verwendet das deepseek-v3 Modell über den g4f Client mit aktivierter
-    Web-Suche für aktuelle und genaue Informationen.
+    Die Anfrage läuft über den AIRouter: Das erste verfügbare Backend aus
+    AI_BACKENDS wird gefragt, bei Fehlern oder langsamen Antworten
+    zusätzlich das nächste. Die erste gültige Antwort wird zurückgegeben.
     
     Args:
         text (str): Der Prompt/die Frage an das AI-Modell
@@ -41,39 +77,51 @@ def get_answer(text):
         str: Die Antwort des AI-Modells
         
     Raises:
-        Exception: Bei Verbindungsproblemen oder API-Fehlern
+        RouterError: Wenn kein Backend eine gültige Antwort geliefert hat
     """
-    client = Client()
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[{"role": "user", "content": text}],
-        web_search=True  # Aktiviert Web-Suche für bessere Informationen
-    )
-    return response.choices[0].message.content
+    return router.complete(text)
 
 
 def parse_ai_to_md():
     """
-    Hauptfunktion: Verarbeitet urls.json und erstellt libraries.md.
+    Hauptfunktion: Verarbeitet die gefundenen URLs und erstellt libraries.md.
     
     Workflow:
-    1. Lädt die URLs aus urls.json
-    2. Für jede Bibliothek:
+    1. Lädt die URLs des letzten keyword_spider-Crawls aus results.db
+       (alle Shards; oder aus urls.json, wenn es dort keinen Lauf gibt)
+    2. Bewertet die Seiten aller Bibliotheken in einem Durchgang und
+       behält pro Bibliothek nur die TOP_K relevantesten Seiten
+    3. Für jede Bibliothek:
        - Erstellt einen detaillierten Prompt mit allen gefundenen URLs
        - Sendet den Prompt an das AI-Modell
        - Sammelt die strukturierte Antwort
-    3. Erstellt eine Markdown-Datei mit allen Ergebnissen
+    4. Schreibt die zerlegten Antworten gesammelt in die Tabelle analyses
+    5. Erstellt eine Markdown-Datei mit allen Ergebnissen
     
     Returns:
         str: Der vollständige Markdown-Text mit allen Bibliotheksinformationen
         
     Raises:
-        FileNotFoundError: Wenn urls.json nicht gefunden wird
+        FileNotFoundError: Wenn weder ein Lauf in results.db noch urls.json existiert
+        ValueError: Wenn im letzten verteilten Crawl ein Shard fehlt
         json.JSONDecodeError: Wenn urls.json ungültiges JSON enthält
     """
-    # --- Read data from urls.json ---
-    with open("urls.json", "r", encoding="utf-8") as f:
-        data = json.load(f)
+    # --- Read data from results.db, fall back to urls.json ---
+    store = ResultStore(RESULTS_DB)
+    # Bei einem verteilten Crawl die Läufe aller Shards (ValueError, wenn einer fehlt)
+    run_ids = store.latest_runs("keyword_spider")
+    if run_ids:
+        data = store.matched_urls(run_ids)
+        print(f"Reading {len(data)} libraries from {RESULTS_DB} (runs {run_ids})")
+    else:
+        with open("urls.json", "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+    # Neuer Lauf; bleibt bei Abbruch als 'running' stehen
+    run_id, _ = store.start_run("parse_with_ai")
+
+    # --- Rank pages and keep only the most relevant ones per library ---
+    data = rank_libraries(data, top_k=TOP_K)
 
     def answer_for_urls(urls):
         """
@@ -131,9 +179,10 @@ def parse_ai_to_md():
             return get_answer(prompt)
         except Exception as e:
             # Bei Fehler wird eine Meldung ausgegeben, aber das Skript läuft weiter
-            print(f"Fehler aufgetreten.")
+            print(f"Fehler aufgetreten: {e}")
 
     md_lines = []
+    analyses = []
     
     # Verarbeite jede Bibliothek einzeln
     for entry in data:
@@ -149,25 +198,39 @@ def parse_ai_to_md():
             md_lines.append(f"{information}\n")
         md_lines.append("")  # Leerzeile zwischen Einträgen
         
+        # Strukturierte Felder für die Datenbank sammeln
+        fields = parse_answer(information)
+        analyses.append((
+            source, domain_of(source), fields["registration"], fields["fee_text"],
+            fields["fee_eur"], fields["details"], information, now(),
+        ))
+        
         # Fortschritt ausgeben
         print("Finished url: ", source)
         print("Information: ", information)
         
+    # --- Save analyses to results.db in one transaction ---
+    store.insert("analyses", [(run_id,) + row for row in analyses])
+    store.finish_run(run_id)
+    store.close()
+    print(f"Saved {len(analyses)} analyses to {RESULTS_DB} (run {run_id})")
         
     return "\n".join(md_lines)
         
 
 
-# --- Generate Markdown ---
-markdown_output = parse_ai_to_md()
+# Statistiken werden auch geschrieben, wenn alle Backends ausfallen (RouterError)
+try:
+    # --- Generate Markdown ---
+    markdown_output = parse_ai_to_md()
 
-# --- Save to libraries.md ---
-with open("libraries.md", "w", encoding="utf-8") as f:
-    f.write(markdown_output)
+    # --- Save to libraries.md ---
+    with open("libraries.md", "w", encoding="utf-8") as f:
+        f.write(markdown_output)
 
-print("✅ Markdown file 'libraries.md' created successfully!")
+    print("✅ Markdown file 'libraries.md' created successfully!")
 
-prompt = """
+    prompt = """
 
 Sortiere und Gruppiere die folgende Liste.
 
@@ -175,10 +238,17 @@ Sende als Antwort ein beautiful markdown.
 
 """
 
-polished_output = get_answer(prompt + markdown_output)
+    polished_output = get_answer(prompt + markdown_output)
+
+    # --- Save to polished.md ---
+    with open("polished.md", "w", encoding="utf-8") as f:
+        f.write(polished_output)
 
-# --- Save to polished.md ---
-with open("polished.md", "w", encoding="utf-8") as f:
-    f.write(polished_output)
+    print("✅ Markdown file 'polished.md' created successfully!")
+finally:
+    # --- Save backend statistics to ai_stats.json ---
+    with open("ai_stats.json", "w", encoding="utf-8") as f:
+        json.dump(router.stats(), f, indent=2)
 
-print("✅ Markdown file 'polished.md' created successfully!")
+    for name, backend_stats in router.stats().items():
+        print(f"{name}: {backend_stats}")
@@ -0,0 +1,513 @@
+"""
+Router über mehrere AI-Backends für parse_with_ai.py.
+
+Ein einzelner g4f-Provider, der hängt oder Fehler liefert, hält sonst die
+komplette sequenzielle Analyse auf. Der AIRouter verteilt Anfragen auf
+mehrere konfigurierbare Backends:
+
+- Token-Bucket pro Backend: Backends ohne freies Kontingent werden
+  übersprungen, statt in deren Rate-Limit zu laufen
+- Hedged Requests: Dauert eine Anfrage länger als die p95-Latenz des
+  Backends, wird parallel eine zweite Anfrage an das nächste Backend
+  gestellt; die erste gültige Antwort gewinnt
+- Timeout pro Aufruf: Liefert ein Backend nicht innerhalb seines timeout,
+  zählt der Aufruf als Fehler, auch wenn er als unterlegener Hedge
+  im Hintergrund weiterläuft
+- Circuit-Breaker: Nach mehreren Fehlern in Folge wird ein Backend für
+  eine Abkühlzeit nicht mehr verwendet
+- Statistiken: Latenz (p50/p95), Erfolge, Fehler und Hedge-Gewinne pro Backend
+
+Backends:
+    g4f:   AI-Modelle über g4f (pip install g4f)
+    local: Lokaler OpenAI-kompatibler Server (z.B. Ollama, llama.cpp)
+"""
+
+import collections
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+
+import requests
+
+
+class RouterError(Exception):
+    """Wird ausgelöst, wenn kein Backend eine gültige Antwort geliefert hat."""
+
+
+class TokenBucket:
+    """
+    Token-Bucket zur Begrenzung der Anfragerate eines Backends.
+
+    Der Bucket fasst burst Tokens und füllt sich mit rate_per_minute Tokens
+    pro Minute wieder auf. Jede Anfrage verbraucht ein Token.
+    """
+
+    def __init__(self, rate_per_minute, burst=1):
+        """
+        Initialisiert einen vollen Bucket.
+
+        Args:
+            rate_per_minute (float): Erlaubte Anfragen pro Minute
+            burst (int): Maximale Anzahl Anfragen direkt hintereinander
+
+        Raises:
+            ValueError: Bei rate_per_minute <= 0 oder burst < 1
+        """
+        if rate_per_minute <= 0:
+            raise ValueError("rate_per_minute must be greater than 0.")
+        if burst < 1:
+            raise ValueError("burst must be at least 1.")
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        """Füllt den Bucket entsprechend der vergangenen Zeit auf."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self):
+        """
+        Entnimmt ein Token, falls vorhanden.
+
+        Returns:
+            bool: True, wenn ein Token entnommen wurde
+        """
+        with self.lock:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+    def wait_time(self):
+        """
+        Gibt zurück, wie lange es bis zum nächsten freien Token dauert.
+
+        Returns:
+            float: Wartezeit in Sekunden (0, wenn ein Token frei ist)
+        """
+        with self.lock:
+            self._refill()
+            if self.tokens >= 1:
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+
+class BackendStats:
+    """Latenz- und Fehlerstatistik eines Backends."""
+
+    def __init__(self, window=200):
+        """
+        Args:
+            window (int): Anzahl der letzten Latenzen für p50/p95
+        """
+        self.calls = 0
+        self.successes = 0
+        self.errors = 0
+        self.hedged_wins = 0
+        self.latencies = collections.deque(maxlen=window)
+        self.lock = threading.Lock()
+
+    def record(self, latency, ok):
+        """
+        Erfasst das Ergebnis eines Aufrufs.
+
+        Args:
+            latency (float): Dauer des Aufrufs in Sekunden
+            ok (bool): Ob der Aufruf eine gültige Antwort lieferte
+        """
+        with self.lock:
+            self.calls += 1
+            if ok:
+                self.successes += 1
+                self.latencies.append(latency)
+            else:
+                self.errors += 1
+
+    def percentile(self, q):
+        """
+        Berechnet ein Latenz-Perzentil erfolgreicher Aufrufe.
+
+        Args:
+            q (float): Perzentil zwischen 0 und 100
+
+        Returns:
+            float oder None: Latenz in Sekunden, None ohne Messwerte
+        """
+        with self.lock:
+            values = sorted(self.latencies)
+        if not values:
+            return None
+        index = min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))
+        return values[index]
+
+    def as_dict(self):
+        """Gibt die Statistik als Dictionary zurück (z.B. für JSON-Export)."""
+        p50, p95 = self.percentile(50), self.percentile(95)
+        return {
+            "calls": self.calls,
+            "successes": self.successes,
+            "errors": self.errors,
+            "hedged_wins": self.hedged_wins,
+            "latency_p50": round(p50, 3) if p50 is not None else None,
+            "latency_p95": round(p95, 3) if p95 is not None else None,
+        }
+
+
+class Backend(ABC):
+    """
+    Basisklasse für AI-Backends.
+
+    Unterklassen implementieren complete(prompt) und geben den Antworttext zurück.
+    """
+
+    def __init__(self, name, rate_per_minute=30, burst=1,
+                 failure_threshold=3, cooldown=120, timeout=120):
+        """
+        Args:
+            name (str): Anzeigename des Backends
+            rate_per_minute (float): Erlaubte Anfragen pro Minute (Token-Bucket)
+            burst (int): Maximale Anzahl Anfragen direkt hintereinander
+            failure_threshold (int): Fehler in Folge, ab denen das Backend gesperrt wird
+            cooldown (float): Sperrzeit des Circuit-Breakers in Sekunden
+            timeout (float): Maximale Dauer eines Aufrufs in Sekunden; danach
+                             zählt er als Fehler (wird vom AIRouter durchgesetzt)
+        """
+        self.name = name
+        self.timeout = timeout
+        self.bucket = TokenBucket(rate_per_minute, burst)
+        self.stats = BackendStats()
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.lock = threading.Lock()
+
+    @abstractmethod
+    def complete(self, prompt):
+        """
+        Sendet einen Prompt an das Backend.
+
+        Args:
+            prompt (str): Der Prompt
+
+        Returns:
+            str: Die Antwort des Modells
+        """
+
+    def is_available(self):
+        """Prüft, ob der Circuit-Breaker des Backends geschlossen (oder abgelaufen) ist."""
+        return time.monotonic() >= self.open_until
+
+    def record_success(self):
+        """Setzt den Circuit-Breaker nach einem erfolgreichen Aufruf zurück."""
+        with self.lock:
+            self.consecutive_failures = 0
+            self.open_until = 0.0
+
+    def record_failure(self):
+        """Zählt einen Fehler und sperrt das Backend ggf. für die Abkühlzeit."""
+        with self.lock:
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= self.failure_threshold:
+                self.open_until = time.monotonic() + self.cooldown
+
+
+class G4FBackend(Backend):
+    """Backend über den g4f-Client (ohne API-Schlüssel)."""
+
+    def __init__(self, name, model="gpt-4o-mini", web_search=True, **kwargs):
+        """
+        Args:
+            name (str): Anzeigename des Backends
+            model (str): g4f-Modellname
+            web_search (bool): Web-Suche des Providers aktivieren
+            **kwargs: Weitere Argumente für Backend (Rate, Circuit-Breaker, Timeout)
+        """
+        super().__init__(name, **kwargs)
+        self.model = model
+        self.web_search = web_search
+
+    def complete(self, prompt):
+        """
+        Sendet den Prompt über g4f an self.model.
+
+        Der g4f-Client kennt keinen verlässlichen Gesamt-Timeout; die
+        Obergrenze self.timeout setzt der AIRouter durch.
+        """
+        # Import erst hier, damit der Router auch ohne installiertes g4f nutzbar ist
+        from g4f.client import Client
+
+        client = Client()
+        response = client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            web_search=self.web_search,
+        )
+        return response.choices[0].message.content
+
+
+class LocalBackend(Backend):
+    """Backend für einen lokalen OpenAI-kompatiblen Server (z.B. Ollama)."""
+
+    def __init__(self, name, url="http://localhost:11434/v1/chat/completions",
+                 model="llama3.1", **kwargs):
+        """
+        Args:
+            name (str): Anzeigename des Backends
+            url (str): URL des chat/completions-Endpunkts
+            model (str): Modellname auf dem lokalen Server
+            **kwargs: Weitere Argumente für Backend (Rate, Circuit-Breaker, Timeout)
+        """
+        super().__init__(name, **kwargs)
+        self.url = url
+        self.model = model
+
+    def complete(self, prompt):
+        """Sendet den Prompt an den lokalen Server."""
+        response = requests.post(
+            self.url,
+            json={"model": self.model, "messages": [{"role": "user", "content": prompt}]},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        return response.json()["choices"][0]["message"]["content"]
+
+
+BACKEND_TYPES = {
+    "g4f": G4FBackend,
+    "local": LocalBackend,
+}
+
+
+def build_backends(config):
+    """
+    Erstellt Backends aus einer Konfigurationsliste.
+
+    Args:
+        config (list): Dictionaries mit 'type' ("g4f" oder "local"), 'name'
+                       und den Argumenten der jeweiligen Backend-Klasse
+
+    Returns:
+        list: Backend-Instanzen in der konfigurierten Reihenfolge
+
+    Raises:
+        ValueError: Bei unbekanntem Backend-Typ
+    """
+    backends = []
+    for entry in config:
+        options = dict(entry)
+        backend_type = options.pop("type")
+        if backend_type not in BACKEND_TYPES:
+            raise ValueError(f"Unknown AI backend type '{backend_type}'.")
+        backends.append(BACKEND_TYPES[backend_type](**options))
+    return backends
+
+
+class AIRouter:
+    """
+    Verteilt Prompts auf mehrere Backends mit Hedging und Circuit-Breaker.
+
+    Die Backends werden in der konfigurierten Reihenfolge bevorzugt.
+
+    Jeder Aufruf läuft in einem eigenen Daemon-Thread statt in einem
+    Thread-Pool: Ein hängender, nicht mehr benötigter Aufruf belegt so keinen
+    Platz für spätere Anfragen und verzögert nicht das Programmende.
+    """
+
+    def __init__(self, backends, hedge_after=30.0, min_samples=5, validate=None):
+        """
+        Args:
+            backends (list): Backend-Instanzen in Prioritätsreihenfolge
+            hedge_after (float): Hedge-Zeitpunkt in Sekunden, solange ein
+                                 Backend weniger als min_samples Messwerte hat
+            min_samples (int): Messwerte, ab denen die p95-Latenz verwendet wird
+            validate: Funktion, die eine Antwort prüft (Standard: nicht leer)
+        """
+        if not backends:
+            raise ValueError("AIRouter needs at least one backend.")
+        self.backends = backends
+        self.hedge_after = hedge_after
+        self.min_samples = min_samples
+        self.validate = validate or (lambda answer: bool(answer and answer.strip()))
+        self.lock = threading.Lock()
+
+    def _hedge_delay(self, backend):
+        """Gibt zurück, nach wie vielen Sekunden ein Aufruf an backend abgesichert wird."""
+        if len(backend.stats.latencies) < self.min_samples:
+            return self.hedge_after
+        return backend.stats.percentile(95)
+
+    def _next_backend(self, tried, block=True):
+        """
+        Wählt das nächste verfügbare Backend mit freiem Token.
+
+        Sind alle ungesperrten Backends im Rate-Limit, wird mit block=True
+        auf das früheste freie Token gewartet. Hedges verwenden block=False:
+        Während ein Aufruf läuft, darf das Warten auf ein Token dessen
+        Antwort nicht verzögern.
+
+        Args:
+            tried (set): Bereits verwendete Backends
+            block (bool): Auf ein freies Token warten
+
+        Returns:
+            Backend oder None, wenn (jetzt) kein Backend in Frage kommt
+        """
+        while True:
+            candidates = [b for b in self.backends if b not in tried and b.is_available()]
+            if not candidates:
+                return None
+            for backend in candidates:
+                if backend.bucket.try_acquire():
+                    return backend
+            if not block:
+                return None
+            time.sleep(min(backend.bucket.wait_time() for backend in candidates))
+
+    def _submit(self, backend, prompt):
+        """
+        Startet einen Aufruf in einem Daemon-Thread.
+
+        Parallel läuft ein Timer über backend.timeout: Ist der Aufruf bis
+        dahin nicht fertig, gilt er als fehlgeschlagen (TimeoutError), auch
+        wenn niemand mehr auf ihn wartet. Eine spätere Antwort wird verworfen.
+
+        Args:
+            backend (Backend): Das aufzurufende Backend
+            prompt (str): Der Prompt
+
+        Returns:
+            Future: Liefert die gültige Antwort oder die Exception des Aufrufs
+        """
+        future = Future()
+        future.set_running_or_notify_cancel()
+        start = time.monotonic()
+
+        timer = threading.Timer(
+            backend.timeout, self._settle, (future, backend, start),
+            {"error": TimeoutError(f"no answer after {backend.timeout}s")},
+        )
+        timer.daemon = True
+        future.add_done_callback(lambda _: timer.cancel())
+        timer.start()
+
+        threading.Thread(
+            target=self._call, args=(future, backend, prompt, start), daemon=True,
+        ).start()
+        return future
+
+    def _call(self, future, backend, prompt, start):
+        """Ruft ein Backend auf (im Daemon-Thread) und meldet das Ergebnis an future."""
+        try:
+            answer = backend.complete(prompt)
+            if not self.validate(answer):
+                raise ValueError("invalid answer")
+        except Exception as e:
+            self._settle(future, backend, start, error=e)
+        else:
+            self._settle(future, backend, start, answer=answer)
+
+    def _settle(self, future, backend, start, answer=None, error=None):
+        """
+        Erfasst das Ergebnis eines Aufrufs genau einmal.
+
+        Wird von Aufruf und Timeout-Timer aufgerufen; was zuerst kommt,
+        bestimmt Latenz, Fehler und Circuit-Breaker-Status.
+
+        Args:
+            future (Future): Das Future des Aufrufs
+            backend (Backend): Das aufgerufene Backend
+            start (float): Startzeitpunkt (time.monotonic)
+            answer (str): Die gültige Antwort (bei Erfolg)
+            error (Exception): Der Fehler (bei Misserfolg oder Timeout)
+        """
+        with self.lock:
+            if future.done():
+                return
+            latency = time.monotonic() - start
+            if error is None:
+                backend.stats.record(latency, ok=True)
+                backend.record_success()
+                future.set_result(answer)
+            else:
+                backend.stats.record(latency, ok=False)
+                backend.record_failure()
+                future.set_exception(error)
+
+    def complete(self, prompt):
+        """
+        Sendet einen Prompt und gibt die erste gültige Antwort zurück.
+
+        Ablauf: Das bevorzugte Backend wird aufgerufen. Liefert es nicht
+        innerhalb seiner p95-Latenz, wird zusätzlich das nächste Backend
+        gefragt (Hedge). Schlägt ein Aufruf fehl oder überschreitet er den
+        timeout seines Backends, wird sofort das nächste Backend versucht.
+        Nicht mehr benötigte Aufrufe laufen im Hintergrund aus, ihr Ergebnis
+        (oder ihr Timeout) wird nur noch für die Statistik erfasst.
+
+        Args:
+            prompt (str): Der Prompt
+
+        Returns:
+            str: Die erste gültige Antwort
+
+        Raises:
+            RouterError: Wenn kein Backend eine gültige Antwort geliefert hat
+        """
+        tried = set()
+        pending = {}
+        errors = []
+
+        def launch(hedge=False):
+            # Nur ohne laufenden Aufruf auf ein Token warten; ein Hedge wird
+            # übersprungen und beim nächsten Hedge-Zeitpunkt erneut versucht
+            backend = self._next_backend(tried, block=not hedge)
+            if backend is None:
+                return False
+            tried.add(backend)
+            pending[self._submit(backend, prompt)] = (backend, hedge)
+            return True
+
+        launch()
+        while pending:
+            # Hedge-Zeitpunkt richtet sich nach dem zuletzt gestarteten Backend
+            timeout = None
+            if len(tried) < len(self.backends):
+                last_backend, _ = list(pending.values())[-1]
+                timeout = max(self._hedge_delay(last_backend), 0.1)
+
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                launch(hedge=True)
+                continue
+
+            for future in done:
+                backend, hedge = pending.pop(future)
+                try:
+                    answer = future.result()
+                except Exception as e:
+                    errors.append(f"{backend.name}: {e!r}")
+                    continue
+                if hedge:
+                    backend.stats.hedged_wins += 1
+                return answer
+
+            if not pending:
+                launch()
+
+        raise RouterError("No AI backend returned a valid answer: " + "; ".join(errors or ["no backend available"]))
+
+    def stats(self):
+        """
+        Gibt die Statistiken aller Backends zurück.
+
+        Returns:
+            dict: Backend-Name -> Statistik-Dictionary
+        """
+        return {backend.name: backend.stats.as_dict() for backend in self.backends}
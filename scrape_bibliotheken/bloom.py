@@ -0,0 +1,186 @@
+"""
+Bloom-Filter für speicherbegrenzte Duplikaterkennung.
+
+Ein Bloom-Filter speichert Zugehörigkeit zu einer Menge in einem festen
+Bit-Array. Er liefert nie falsch-negative Ergebnisse, aber mit einer
+einstellbaren Wahrscheinlichkeit falsch-positive ("schon gesehen", obwohl
+neu). Für den Dupefilter bedeutet das: Ein kleiner Anteil neuer URLs wird
+fälschlich verworfen, dafür wächst der Speicher nur um wenige Bytes pro URL
+statt um ein komplettes Fingerprint-Objekt.
+
+ScalableBloomFilter (Almeida et al., 2007) hängt bei Erreichen der
+Kapazität einen weiteren, größeren Filter mit strengerer Fehlerrate an,
+sodass die Gesamt-Fehlerrate unabhängig von der Anzahl URLs begrenzt bleibt.
+"""
+
+import hashlib
+import math
+
+
+def _hashes(key):
+    """Berechnet die zwei Basis-Hashwerte für das Double Hashing eines Schlüssels (bytes)."""
+    digest = hashlib.blake2b(key, digest_size=16).digest()
+    return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+
+
+class BloomFilter:
+    """
+    Klassischer Bloom-Filter mit fester Kapazität.
+
+    Die k Bit-Positionen werden per Double Hashing aus einem einzigen
+    BLAKE2b-Digest berechnet.
+    """
+
+    def __init__(self, capacity, error_rate):
+        """
+        Initialisiert einen leeren Filter.
+
+        Args:
+            capacity (int): Anzahl Elemente, für die die Fehlerrate garantiert wird
+            error_rate (float): Gewünschte Falsch-Positiv-Rate (z.B. 0.0001)
+
+        Raises:
+            ValueError: Bei ungültiger Kapazität oder Fehlerrate
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1.")
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1.")
+
+        self.capacity = capacity
+        self.error_rate = error_rate
+        # Optimale Größe m und Anzahl Hashfunktionen k für n Elemente und Fehlerrate p
+        self.num_bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, hashes):
+        """Berechnet die k Bit-Positionen aus den Basis-Hashwerten."""
+        h1, h2 = hashes
+        num_bits = self.num_bits
+        return [(h1 + i * h2) % num_bits for i in range(self.num_hashes)]
+
+    def __contains__(self, key):
+        """
+        Prüft, ob ein Schlüssel (wahrscheinlich) enthalten ist.
+
+        Args:
+            key (bytes): Der zu prüfende Schlüssel
+
+        Returns:
+            bool: False wenn sicher nicht enthalten, True wenn wahrscheinlich enthalten
+        """
+        return self._contains(_hashes(key))
+
+    def _contains(self, hashes):
+        """Wie __contains__, aber mit bereits berechneten Basis-Hashwerten."""
+        bits = self.bits
+        for pos in self._positions(hashes):
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def add(self, key):
+        """
+        Fügt einen Schlüssel hinzu.
+
+        Args:
+            key (bytes): Der hinzuzufügende Schlüssel
+
+        Returns:
+            bool: True, wenn der Schlüssel (wahrscheinlich) bereits enthalten war
+        """
+        return self._add(_hashes(key))
+
+    def _add(self, hashes):
+        """Wie add, aber mit bereits berechneten Basis-Hashwerten."""
+        bits = self.bits
+        present = True
+        for pos in self._positions(hashes):
+            mask = 1 << (pos & 7)
+            if not bits[pos >> 3] & mask:
+                present = False
+                bits[pos >> 3] |= mask
+        if not present:
+            self.count += 1
+        return present
+
+    def __len__(self):
+        """Anzahl der (geschätzt) eingefügten, verschiedenen Schlüssel."""
+        return self.count
+
+
+class ScalableBloomFilter:
+    """
+    Bloom-Filter, der mit der Anzahl der Elemente mitwächst.
+
+    Jeder neue Teilfilter hat GROWTH-fache Kapazität und eine um
+    TIGHTENING verringerte Fehlerrate. Die erste Fehlerrate wird so gewählt,
+    dass die Summe über alle Teilfilter error_rate nicht überschreitet.
+    """
+
+    GROWTH = 2
+    TIGHTENING = 0.5
+
+    def __init__(self, initial_capacity=100000, error_rate=0.0001):
+        """
+        Initialisiert den Filter mit einem ersten Teilfilter.
+
+        Args:
+            initial_capacity (int): Kapazität des ersten Teilfilters
+            error_rate (float): Obergrenze der Gesamt-Falsch-Positiv-Rate
+        """
+        self.initial_capacity = initial_capacity
+        self.error_rate = error_rate
+        self.filters = []
+        self._add_filter()
+
+    def _add_filter(self):
+        """Hängt einen neuen, größeren Teilfilter an."""
+        index = len(self.filters)
+        capacity = self.initial_capacity * self.GROWTH ** index
+        error_rate = self.error_rate * (1 - self.TIGHTENING) * self.TIGHTENING ** index
+        self.filters.append(BloomFilter(capacity, error_rate))
+
+    def __contains__(self, key):
+        """
+        Prüft, ob ein Schlüssel (wahrscheinlich) enthalten ist.
+
+        Args:
+            key (bytes): Der zu prüfende Schlüssel
+
+        Returns:
+            bool: False wenn sicher nicht enthalten, True wenn wahrscheinlich enthalten
+        """
+        hashes = _hashes(key)
+        return any(bloom._contains(hashes) for bloom in reversed(self.filters))
+
+    def add(self, key):
+        """
+        Fügt einen Schlüssel hinzu, falls er nicht bereits enthalten ist.
+
+        Args:
+            key (bytes): Der hinzuzufügende Schlüssel
+
+        Returns:
+            bool: True, wenn der Schlüssel (wahrscheinlich) bereits enthalten war
+        """
+        hashes = _hashes(key)
+        if any(bloom._contains(hashes) for bloom in reversed(self.filters)):
+            return True
+        current = self.filters[-1]
+        if current.count >= current.capacity:
+            self._add_filter()
+            current = self.filters[-1]
+        current._add(hashes)
+        return False
+
+    def __len__(self):
+        """Anzahl der (geschätzt) eingefügten, verschiedenen Schlüssel."""
+        return sum(len(bloom) for bloom in self.filters)
+
+    @property
+    def nbytes(self):
+        """Speicherbedarf der Bit-Arrays in Bytes."""
+        return sum(len(bloom.bits) for bloom in self.filters)
@@ -0,0 +1,134 @@
+"""
+Dupefilter für das Scrape-Bibliotheken-Projekt.
+
+Scrapys Standard-Dupefilter (RFPDupeFilter) speichert jeden Request-Fingerprint
+in einem Python-Set. Bei zehntausenden Bibliotheks-Domains und Folge-Links
+wächst dieses Set ohne Grenze. Der BloomDupeFilter ersetzt das Set durch
+einen ScalableBloomFilter (siehe bloom.py) mit konfigurierbarer
+Falsch-Positiv-Rate.
+
+Um den Dupefilter zu aktivieren, muss er in DUPEFILTER_CLASS eingetragen werden.
+
+Weitere Informationen:
+https://docs.scrapy.org/en/latest/topics/settings.html#dupefilter-class
+"""
+
+import logging
+import os
+import pickle
+
+from scrapy.dupefilters import BaseDupeFilter
+from scrapy.utils.job import job_dir
+from scrapy.utils.request import referer_str
+
+from scrape_bibliotheken.bloom import ScalableBloomFilter
+
+
+class BloomDupeFilter(BaseDupeFilter):
+    """
+    Speicherbegrenzter Dupefilter auf Basis eines skalierbaren Bloom-Filters.
+
+    Mit der Wahrscheinlichkeit BLOOM_DUPEFILTER_ERROR_RATE wird eine neue URL
+    fälschlich als Duplikat verworfen. Bei gesetztem JOBDIR wird der Filter
+    beim Schließen in JOBDIR/requests.bloom gespeichert und beim nächsten
+    Start wieder geladen (Pause/Fortsetzen von Crawls).
+
+    Stats:
+        dupefilter/filtered, dupefilter/bloom_bytes
+    """
+
+    def __init__(self, path=None, debug=False, fingerprinter=None, stats=None,
+                 initial_capacity=100000, error_rate=0.0001):
+        """
+        Initialisiert den Dupefilter.
+
+        Args:
+            path (str): JOBDIR zum Speichern des Filters oder None
+            debug (bool): Jedes gefilterte Duplikat loggen (DUPEFILTER_DEBUG)
+            fingerprinter: Request-Fingerprinter des Crawlers
+            stats: Der StatsCollector des Crawlers
+            initial_capacity (int): Kapazität des ersten Bloom-Teilfilters
+            error_rate (float): Obergrenze der Falsch-Positiv-Rate
+        """
+        self.fingerprinter = fingerprinter
+        self.stats = stats
+        self.debug = debug
+        self.logdupes = True
+        self.logger = logging.getLogger(__name__)
+        self.file = os.path.join(path, "requests.bloom") if path else None
+
+        if self.file and os.path.exists(self.file):
+            with open(self.file, "rb") as f:
+                self.fingerprints = pickle.load(f)
+        else:
+            self.fingerprints = ScalableBloomFilter(initial_capacity, error_rate)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        """
+        Factory-Methode zum Erstellen des Dupefilters.
+
+        Args:
+            crawler: Die Scrapy-Crawler-Instanz
+
+        Returns:
+            Eine neue Instanz des Dupefilters
+        """
+        settings = crawler.settings
+        return cls(
+            job_dir(settings),
+            settings.getbool("DUPEFILTER_DEBUG"),
+            fingerprinter=crawler.request_fingerprinter,
+            stats=crawler.stats,
+            initial_capacity=settings.getint("BLOOM_DUPEFILTER_CAPACITY", 100000),
+            error_rate=settings.getfloat("BLOOM_DUPEFILTER_ERROR_RATE", 0.0001),
+        )
+
+    def request_seen(self, request):
+        """
+        Prüft, ob ein Request (wahrscheinlich) bereits gesehen wurde, und merkt ihn sich.
+
+        Args:
+            request: Der zu prüfende Request
+
+        Returns:
+            bool: True für Duplikate
+        """
+        return self.fingerprints.add(self.fingerprinter.fingerprint(request))
+
+    def close(self, reason):
+        """
+        Speichert den Filter bei gesetztem JOBDIR.
+
+        Args:
+            reason (str): Grund für das Schließen des Spiders
+        """
+        if self.stats is not None:
+            self.stats.set_value("dupefilter/bloom_bytes", self.fingerprints.nbytes)
+        if self.file:
+            with open(self.file, "wb") as f:
+                pickle.dump(self.fingerprints, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def log(self, request, spider):
+        """
+        Loggt ein gefiltertes Duplikat und zählt es in den Stats.
+
+        Args:
+            request: Der verworfene Request
+            spider: Der Spider, der den Request erstellt hat
+        """
+        if self.debug:
+            msg = "Filtered duplicate request: %(request)s (referer: %(referer)s)"
+            args = {"request": request, "referer": referer_str(request)}
+            self.logger.debug(msg, args, extra={"spider": spider})
+        elif self.logdupes:
+            msg = (
+                "Filtered duplicate request: %(request)s"
+                " - no more duplicates will be shown"
+                " (see DUPEFILTER_DEBUG to show all duplicates)"
+            )
+            self.logger.debug(msg, {"request": request}, extra={"spider": spider})
+            self.logdupes = False
+
+        if self.stats is not None:
+            self.stats.inc_value("dupefilter/filtered")
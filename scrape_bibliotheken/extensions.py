@@ -0,0 +1,140 @@
+"""
+Scrapy-Extensions für das Scrape-Bibliotheken-Projekt.
+
+Extensions hängen sich über Signals an den Crawl und werden in den
+EXTENSIONS-Einstellungen aktiviert.
+
+Weitere Informationen:
+https://docs.scrapy.org/en/latest/topics/extensions.html
+"""
+
+from urllib.parse import urlparse
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+
+from scrape_bibliotheken import resolver
+
+
+class TransportStats:
+    """
+    Misst Verbindungsaufbau und DNS-Auflösung pro Crawl.
+
+    Die Extension schreibt am Ende jedes Crawls folgende Werte in die Stats:
+    - transport/protocol/<Protokoll>: Anzahl Responses pro Protokoll (HTTP/1.1, HTTP/2)
+    - transport/cold_latency_avg: Mittlere Latenz der ersten Response pro Host
+      (enthält DNS, TCP- und TLS-Handshake)
+    - transport/warm_latency_avg: Mittlere Latenz aller weiteren Responses
+      (wiederverwendete Verbindung)
+    - transport/handshake_overhead_est: Differenz aus beiden, geschätzter
+      Aufwand für den Verbindungsaufbau
+    - dns/*: Zähler der DNS-Auflösungen (siehe resolver.py)
+    - dns/resolve_time_avg: Mittlere Dauer einer echten Auflösung
+
+    Ist DNS_PREWARM_ENABLED gesetzt, werden beim Öffnen des Spiders alle Hosts
+    aus start_urls im Hintergrund aufgelöst.
+    """
+
+    def __init__(self, stats, prewarm_enabled):
+        """
+        Initialisiert die Extension.
+
+        Args:
+            stats: Der StatsCollector des Crawlers
+            prewarm_enabled (bool): Ob der DNS-Cache beim Start vorgewärmt wird
+        """
+        self.stats = stats
+        self.prewarm_enabled = prewarm_enabled
+        self.seen_hosts = set()
+        self.cold_latencies = []
+        self.warm_latencies = []
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        """
+        Factory-Methode zum Erstellen der Extension.
+
+        Args:
+            crawler: Die Scrapy-Crawler-Instanz
+
+        Returns:
+            Eine neue Instanz der Extension
+
+        Raises:
+            NotConfigured: Wenn TRANSPORT_STATS_ENABLED deaktiviert ist
+        """
+        if not crawler.settings.getbool("TRANSPORT_STATS_ENABLED", True):
+            raise NotConfigured
+        ext = cls(crawler.stats, crawler.settings.getbool("DNS_PREWARM_ENABLED"))
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(ext.response_received, signal=signals.response_received)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        return ext
+
+    def spider_opened(self, spider):
+        """
+        Signal-Handler für das Öffnen eines Spiders; wärmt ggf. den DNS-Cache vor.
+
+        Args:
+            spider: Der Spider, der geöffnet wurde
+        """
+        if not self.prewarm_enabled:
+            return
+        hosts = [urlparse(url).hostname for url in getattr(spider, "start_urls", [])]
+        count = resolver.prewarm(hosts)
+        self.stats.set_value("dns/prewarmed", count)
+        spider.logger.info("DNS-Cache wird für %d Hosts vorgewärmt", count)
+
+    def response_received(self, response, request, spider):
+        """
+        Signal-Handler für jede empfangene Response; sammelt Latenzen und Protokolle.
+
+        Args:
+            response: Die empfangene Response
+            request: Der zugehörige Request
+            spider: Der Spider, für den die Response bestimmt ist
+        """
+        protocol = getattr(response, "protocol", None) or "unbekannt"
+        self.stats.inc_value(f"transport/protocol/{protocol}")
+
+        latency = request.meta.get("download_latency")
+        if latency is None:
+            return
+
+        host = urlparse(response.url).netloc
+        if host in self.seen_hosts:
+            self.warm_latencies.append(latency)
+        else:
+            self.seen_hosts.add(host)
+            self.cold_latencies.append(latency)
+
+    def spider_closed(self, spider):
+        """
+        Signal-Handler für das Schließen eines Spiders; schreibt die Messwerte in die Stats.
+
+        Args:
+            spider: Der Spider, der geschlossen wurde
+        """
+        cold = _mean(self.cold_latencies)
+        warm = _mean(self.warm_latencies)
+        if cold is not None:
+            self.stats.set_value("transport/cold_latency_avg", round(cold, 4))
+        if warm is not None:
+            self.stats.set_value("transport/warm_latency_avg", round(warm, 4))
+        if cold is not None and warm is not None:
+            self.stats.set_value("transport/handshake_overhead_est", round(cold - warm, 4))
+
+        for key, value in resolver.dnsstats.items():
+            if key != "resolve_time":
+                self.stats.set_value(f"dns/{key}", value)
+        # Parallele Auflösungen überlappen, daher Mittelwert statt Summe
+        if resolver.dnsstats["resolved"]:
+            avg = resolver.dnsstats["resolve_time"] / resolver.dnsstats["resolved"]
+            self.stats.set_value("dns/resolve_time_avg", round(avg, 4))
+
+
+def _mean(values):
+    """Gibt den Mittelwert einer Liste zurück oder None bei leerer Liste."""
+    if not values:
+        return None
+    return sum(values) / len(values)
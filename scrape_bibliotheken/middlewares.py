@@ -13,7 +13,15 @@ https://docs.scrapy.org/en/latest/topics/spider-middleware.html
 https://docs.scrapy.org/en/latest/topics/downloader-middleware.html
 """
 
+import json
+import os
+from datetime import datetime, timezone
+from urllib.parse import urljoin
+
 from scrapy import signals
+from scrapy.exceptions import IgnoreRequest, NotConfigured
+from scrapy.utils.httpobj import urlparse_cached
+from scrapy.utils.url import url_is_from_any_domain
 from itemadapter import ItemAdapter
 
 
@@ -195,3 +203,230 @@ class ScrapeBibliothekenDownloaderMiddleware:
             spider: Der Spider, der geöffnet wurde
         """
         spider.logger.info("Spider opened: %s" % spider.name)
+
+
+class CircuitBreakerMiddleware:
+    """
+    Downloader-Middleware, die tote Bibliotheks-Domains schnell aussortiert.
+
+    Viele Website-Angaben aus Wikipedia sind veraltet: Domains existieren nicht
+    mehr, Hosts antworten nicht oder leiten auf Stadtportale außerhalb von
+    allowed_domains um. Ohne Circuit-Breaker kostet jeder dieser Hosts den
+    vollen Download-Timeout plus alle Retries.
+
+    Funktionsweise:
+    - Zählt pro Host aufeinanderfolgende Fehlschläge (Download-Exceptions,
+      5xx-Responses und Umleitungen auf fremde Domains). Jede andere Response
+      setzt den Zähler zurück.
+    - Ab CIRCUIT_BREAKER_THRESHOLD Fehlschlägen ist der Host "ausgelöst":
+      alle weiteren Requests (auch Retries) werden sofort verworfen. Leitet
+      bereits die Start-URL auf eine fremde Domain um, wird der Host sofort
+      ausgelöst (die Bibliothek ist umgezogen, jeder weitere Request landet
+      ebenfalls dort).
+    - Ausgelöste Hosts werden beim Schließen des Spiders in
+      CIRCUIT_BREAKER_FILE gespeichert; bei verteilten Crawls erhält jeder
+      Shard eine eigene Datei (z.B. dead_hosts_0of3.json), damit parallele
+      Prozesse sich nicht überschreiben. Im nächsten Lauf wird jeder dieser
+      Hosts nur mit einem günstigen Probe-Request geprüft (kurzer Timeout,
+      keine Retries): Erfolg entfernt ihn aus der Liste, ein Fehler löst
+      den Breaker sofort wieder aus.
+
+    Stats:
+        circuit_breaker/tripped, circuit_breaker/skipped,
+        circuit_breaker/probes, circuit_breaker/recovered
+    """
+
+    def __init__(self, stats, threshold, dead_hosts_file, probe_timeout):
+        """
+        Initialisiert die Middleware.
+
+        Args:
+            stats: Der StatsCollector des Crawlers
+            threshold (int): Fehlschläge in Folge, ab denen ein Host ausgelöst wird
+            dead_hosts_file (str): Pfad zur JSON-Datei mit toten Hosts (leer = keine Persistenz)
+            probe_timeout (float): Download-Timeout für Probe-Requests in Sekunden
+        """
+        self.stats = stats
+        self.threshold = threshold
+        self.dead_hosts_file = dead_hosts_file
+        self.probe_timeout = probe_timeout
+        self.failures = {}     # Host -> Anzahl Fehlschläge in Folge
+        self.tripped = {}      # Host -> Info-Dictionary (failures, reason, since)
+        self.probation = {}    # Host -> Info-Dictionary aus dem letzten Lauf
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        """
+        Factory-Methode zum Erstellen der Middleware-Instanz.
+
+        Args:
+            crawler: Die Scrapy-Crawler-Instanz
+
+        Returns:
+            Eine neue Instanz der Middleware
+
+        Raises:
+            NotConfigured: Wenn CIRCUIT_BREAKER_ENABLED deaktiviert ist
+        """
+        settings = crawler.settings
+        if not settings.getbool("CIRCUIT_BREAKER_ENABLED", True):
+            raise NotConfigured
+        s = cls(
+            crawler.stats,
+            settings.getint("CIRCUIT_BREAKER_THRESHOLD", 2),
+            settings.get("CIRCUIT_BREAKER_FILE", "dead_hosts.json"),
+            settings.getfloat("CIRCUIT_BREAKER_PROBE_TIMEOUT", 5),
+        )
+        crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(s.spider_closed, signal=signals.spider_closed)
+        return s
+
+    def process_request(self, request, spider):
+        """
+        Verwirft Requests an ausgelöste Hosts und macht Requests an Hosts
+        aus dem letzten Lauf zu günstigen Probe-Requests.
+
+        Args:
+            request: Das Request-Objekt, das verarbeitet werden soll
+            spider: Der Spider, der den Request erstellt hat
+
+        Returns:
+            None: Request normal verarbeiten
+
+        Raises:
+            IgnoreRequest: Wenn der Host ausgelöst ist
+        """
+        host = urlparse_cached(request).hostname
+        if host in self.tripped:
+            self.stats.inc_value("circuit_breaker/skipped")
+            raise IgnoreRequest(f"Circuit-Breaker für {host} ausgelöst")
+
+        if host in self.probation:
+            self.stats.inc_value("circuit_breaker/probes")
+            request.meta["download_timeout"] = self.probe_timeout
+            request.meta["dont_retry"] = True
+        return None
+
+    def process_response(self, request, response, spider):
+        """
+        Wertet eine Response aus: Serverfehler (5xx) und Umleitungen auf
+        fremde Domains zählen als Fehlschlag, alle anderen Responses setzen
+        den Zähler des Hosts zurück. Eine Umleitung der Start-URL (Tiefe 0)
+        auf eine fremde Domain löst den Breaker sofort aus.
+
+        Args:
+            request: Das ursprüngliche Request-Objekt
+            response: Das Response-Objekt vom Downloader
+            spider: Der Spider, für den die Response bestimmt ist
+
+        Returns:
+            Response-Objekt: Wird unverändert weitergeleitet
+        """
+        host = urlparse_cached(request).hostname
+        location = response.headers.get("Location")
+        allowed_domains = getattr(spider, "allowed_domains", None)
+
+        if response.status >= 500:
+            self._record_failure(host, f"http_{response.status}", spider)
+            return response
+
+        if 300 <= response.status < 400 and location and allowed_domains:
+            target = urljoin(request.url, location.decode("latin1"))
+            if not url_is_from_any_domain(target, allowed_domains):
+                start_url = request.meta.get("depth", 0) == 0
+                self._record_failure(host, "offsite_redirect", spider, trip=start_url)
+                return response
+
+        self.failures.pop(host, None)
+        if self.probation.pop(host, None) is not None:
+            self.stats.inc_value("circuit_breaker/recovered")
+        return response
+
+    def process_exception(self, request, exception, spider):
+        """
+        Zählt Download-Exceptions (Timeouts, DNS-Fehler, Verbindungsabbrüche)
+        als Fehlschlag des Hosts.
+
+        Args:
+            request: Das Request-Objekt, bei dem die Exception auftrat
+            exception: Die aufgetretene Exception
+            spider: Der Spider, für den der Request bestimmt war
+
+        Returns:
+            None: Exception-Verarbeitung fortsetzen (z.B. durch RetryMiddleware)
+        """
+        if isinstance(exception, IgnoreRequest):
+            return None
+        host = urlparse_cached(request).hostname
+        self._record_failure(host, type(exception).__name__, spider)
+        return None
+
+    def _record_failure(self, host, reason, spider, trip=False):
+        """
+        Erhöht den Fehlerzähler eines Hosts und löst den Breaker ggf. aus.
+
+        Hosts aus dem letzten Lauf (Probe) werden bereits beim ersten
+        Fehlschlag ausgelöst.
+
+        Args:
+            host (str): Der betroffene Host
+            reason (str): Kurzbeschreibung des Fehlschlags
+            spider: Der aktuelle Spider (für Logging)
+            trip (bool): Breaker unabhängig vom Zähler sofort auslösen
+        """
+        count = self.failures.get(host, 0) + 1
+        self.failures[host] = count
+        if count < self.threshold and host not in self.probation and not trip:
+            return
+
+        # Bei Hosts aus dem letzten Lauf bleibt der ursprüngliche Zeitpunkt erhalten
+        previous = self.probation.pop(host, None) or {}
+        since = previous.get("since") or datetime.now(timezone.utc).isoformat(timespec="seconds")
+        self.tripped[host] = {
+            "failures": count,
+            "reason": reason,
+            "since": since,
+        }
+        self.stats.inc_value("circuit_breaker/tripped")
+        spider.logger.info("Circuit-Breaker für %s ausgelöst (%s)", host, reason)
+
+    def spider_opened(self, spider):
+        """
+        Signal-Handler für das Öffnen eines Spiders; lädt die toten Hosts des letzten Laufs.
+
+        Bei einem Shard (spider.shard = "i/n") wird der Dateiname um den
+        Shard ergänzt, z.B. dead_hosts.json -> dead_hosts_0of3.json.
+
+        Args:
+            spider: Der Spider, der geöffnet wurde
+        """
+        shard = getattr(spider, "shard", None)
+        if self.dead_hosts_file and shard:
+            base, ext = os.path.splitext(self.dead_hosts_file)
+            self.dead_hosts_file = f"{base}_{shard.replace('/', 'of')}{ext}"
+        if not self.dead_hosts_file or not os.path.exists(self.dead_hosts_file):
+            return
+        with open(self.dead_hosts_file, "r", encoding="utf-8") as f:
+            self.probation = json.load(f)
+        spider.logger.info(
+            "%d tote Hosts aus %s werden nur geprüft",
+            len(self.probation), self.dead_hosts_file,
+        )
+
+    def spider_closed(self, spider):
+        """
+        Signal-Handler für das Schließen eines Spiders; speichert die toten Hosts.
+
+        Hosts aus dem letzten Lauf, die in diesem Lauf nicht angefragt wurden,
+        bleiben in der Liste erhalten.
+
+        Args:
+            spider: Der Spider, der geschlossen wurde
+        """
+        dead_hosts = {**self.probation, **self.tripped}
+        if not self.dead_hosts_file:
+            return
+        if not dead_hosts and not os.path.exists(self.dead_hosts_file):
+            return
+        with open(self.dead_hosts_file, "w", encoding="utf-8") as f:
+            json.dump(dead_hosts, f, ensure_ascii=False, indent=2, sort_keys=True)
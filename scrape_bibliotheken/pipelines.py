@@ -12,29 +12,139 @@ https://docs.scrapy.org/en/latest/topics/item-pipeline.html
 """
 
 from itemadapter import ItemAdapter
+from scrapy import signals
+
+from scrape_bibliotheken.store import ResultStore, domain_of
 
 
 class ScrapeBibliothekenPipeline:
     """
-    Standard-Pipeline für Bibliotheksinformationen.
-    
-    Diese Pipeline führt aktuell keine Transformationen durch und gibt
-    Items unverändert zurück. Sie kann erweitert werden für:
-    - Validierung der Daten
-    - Bereinigung/Normalisierung von URLs und Text
-    - Speicherung in Datenbanken
-    - Filterung von duplizierten Items
+    Schreibt die Items aller Spider in die SQLite-Ergebnisdatenbank.
+
+    Jeder Spider-Lauf wird als eigener Lauf (Tabelle runs) angelegt, bei
+    einem verteilten Crawl mit der Shard-Angabe des Spiders (shard=i/n).
+    Items werden gepuffert und alle RESULTS_DB_BATCH_SIZE Items in einer
+    Transaktion per executemany geschrieben; der Rest beim Schließen.
+    Als Status des Laufs wird der Abschlussgrund von Scrapy gespeichert
+    ("finished" oder z.B. "shutdown" bei Abbruch).
+    Die Items selbst bleiben unverändert, Feed-Exporte (-o) funktionieren
+    also weiterhin.
+
+    Erkannte Items:
+        - get_wikipedia: 'name', 'wikipedia_url', 'website' -> libraries
+        - keyword_spider: 'source_url', 'matched_urls' -> pages (eine Zeile pro URL)
+
+    Einstellungen:
+        RESULTS_DB: Pfad zur Datenbank (leer = Pipeline deaktiviert)
+        RESULTS_DB_BATCH_SIZE: Anzahl Zeilen pro Transaktion
+        RESULTS_DB_CRAWL: Crawl-ID, die mehrere Läufe zu einem Crawl verbindet
+            (bei verteilten Crawls Pflicht, damit die Shards eines Crawls
+            nicht mit denen anderer Crawls gemischt werden)
     """
-    
+
+    def __init__(self, path, batch_size, crawl=None):
+        """
+        Initialisiert die Pipeline.
+
+        Args:
+            path (str): Pfad zur SQLite-Datei oder leer
+            batch_size (int): Anzahl Zeilen pro Transaktion
+            crawl (str): Optionale Crawl-ID
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.crawl = crawl
+        self.store = None
+        self.run_id = None
+        self.crawled_at = None
+        self.buffers = {"libraries": [], "pages": []}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        """Erstellt die Pipeline aus den Crawler-Einstellungen."""
+        pipeline = cls(
+            crawler.settings.get("RESULTS_DB", "results.db"),
+            crawler.settings.getint("RESULTS_DB_BATCH_SIZE", 500),
+            crawler.settings.get("RESULTS_DB_CRAWL") or None,
+        )
+        crawler.signals.connect(pipeline.spider_closed, signal=signals.spider_closed)
+        return pipeline
+
+    def open_spider(self, spider):
+        """
+        Öffnet die Datenbank und legt einen neuen Lauf an.
+
+        Raises:
+            ValueError: Bei einem Shard ohne RESULTS_DB_CRAWL
+        """
+        if not self.path:
+            return
+        shard = getattr(spider, "shard", None)
+        if shard and not self.crawl:
+            raise ValueError(
+                "Sharded crawls need a crawl id shared by all shards, "
+                "e.g. -s RESULTS_DB_CRAWL=2026-10 (or disable the database with -s RESULTS_DB=)."
+            )
+        self.store = ResultStore(self.path)
+        self.run_id, self.crawled_at = self.store.start_run(spider.name, crawl=self.crawl, shard=shard)
+        spider.logger.info(f"Writing results to {self.path} (run {self.run_id})")
+
+    def close_spider(self, spider):
+        """Schreibt verbleibende Zeilen (der Lauf wird in spider_closed abgeschlossen)."""
+        if self.store:
+            self.flush()
+
+    def spider_closed(self, spider, reason):
+        """
+        Signal-Handler für das Schließen eines Spiders; speichert den Abschlussgrund.
+
+        Nur Läufe mit reason "finished" werden von den folgenden Stufen gelesen.
+
+        Args:
+            spider: Der Spider, der geschlossen wurde
+            reason (str): Abschlussgrund von Scrapy (z.B. "finished", "shutdown")
+        """
+        if not self.store:
+            return
+        self.store.finish_run(self.run_id, reason)
+        self.store.close()
+        self.store = None
+
     def process_item(self, item, spider):
         """
-        Verarbeitet ein einzelnes Item aus einem Spider.
+        Puffert ein Item für die Datenbank.
         
         Args:
             item: Das zu verarbeitende Item (Dictionary oder Item-Objekt)
             spider: Der Spider, der das Item erstellt hat
             
         Returns:
-            Das verarbeitete Item (unverändert in der aktuellen Implementation)
+            Das unveränderte Item
         """
+        if not self.store:
+            return item
+
+        adapter = ItemAdapter(item)
+        if "matched_urls" in adapter:
+            source_url = adapter.get("source_url")
+            domain = domain_of(source_url)
+            self.buffers["pages"].extend(
+                (self.run_id, source_url, domain, url, position, self.crawled_at)
+                for position, url in enumerate(adapter.get("matched_urls") or [])
+            )
+        elif "wikipedia_url" in adapter:
+            website = adapter.get("website")
+            self.buffers["libraries"].append((
+                self.run_id, adapter.get("name"), adapter.get("wikipedia_url"),
+                website, domain_of(website), self.crawled_at,
+            ))
+
+        if sum(len(rows) for rows in self.buffers.values()) >= self.batch_size:
+            self.flush()
         return item
+
+    def flush(self):
+        """Schreibt alle gepufferten Zeilen, je Tabelle in einer Transaktion."""
+        for table, rows in self.buffers.items():
+            self.store.insert(table, rows)
+            rows.clear()
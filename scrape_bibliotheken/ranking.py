@@ -0,0 +1,243 @@
+"""
+Lokales Ranking der gefundenen Bibliotheksseiten vor der AI-Analyse.
+
+Der keyword_spider findet pro Bibliothek oft 20 bis 50 Links (siehe Coburg
+in example_output/urls.json). Werden alle in einen Prompt gepackt, wachsen
+Prompt und Analysezeit mit der Größe der Website. Dieses Modul lädt die
+Seiten, bewertet ihre Texte per BM25 gegen eine Anfrage zu Anmeldung und
+Gebühren und behält pro Bibliothek nur die besten top_k Seiten.
+
+Die Bewertung läuft für alle Bibliotheken in einem Durchgang über eine
+gemeinsame dünnbesetzte Term-Dokument-Matrix (scipy.sparse), sodass die
+IDF-Gewichte über alle Bibliotheksseiten hinweg geschätzt werden.
+
+Beim Laden gelten dieselben Höflichkeitsregeln wie beim Crawlen: pro Host
+wird immer nur eine Seite gleichzeitig geladen, mit FETCH_DELAY Sekunden
+Pause dazwischen; nur verschiedene Hosts laufen parallel.
+
+Voraussetzungen:
+    - numpy und scipy (pip install numpy scipy)
+"""
+
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import numpy as np
+import requests
+from parsel import Selector
+from scipy import sparse
+
+
+# Wortstämme der Anfrage; ein Term passt, wenn er einen Stamm enthält,
+# damit auch Komposita wie "Jahresgebühr" oder "Onlineanmeldung" treffen
+QUERY_STEMS = (
+    "anmeld", "registrier", "ausweis", "mitglied", "gebühr", "entgelt",
+    "kosten", "preis", "euro", "€", "online", "benutzungsordnung", "wohnsitz",
+)
+
+# BM25-Parameter (Standardwerte nach Robertson/Zaragoza)
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Netzwerk-Einstellungen für das Laden der Seiten
+FETCH_TIMEOUT = 10
+# Anzahl Hosts, die parallel geladen werden (pro Host immer nur ein Request,
+# wie CONCURRENT_REQUESTS_PER_DOMAIN = 1 in settings.py)
+FETCH_WORKERS = 16
+# Pause zwischen zwei Requests an denselben Host (wie DOWNLOAD_DELAY in settings.py)
+FETCH_DELAY = 1
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; de-DE) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/128.0.6613.121 Safari/537.36"
+)
+
+TOKEN_RE = re.compile(r"[a-zäöüß0-9€]+")
+
+
+def tokenize(text):
+    """
+    Zerlegt einen Text in kleingeschriebene Terme.
+
+    Args:
+        text (str): Der zu zerlegende Text
+
+    Returns:
+        list: Terme (Buchstaben, Ziffern, €)
+    """
+    return TOKEN_RE.findall(text.lower())
+
+
+def fetch_text(url, session=None):
+    """
+    Lädt eine Seite und extrahiert ihren sichtbaren Text.
+
+    Die URL selbst wird immer mit aufgenommen, da ihr Pfad oft schon
+    aussagekräftig ist (z.B. ".../anmeldung-bibliotheksausweis.php").
+    Fehler beim Laden werden ignoriert; dann wird nur die URL bewertet.
+    Ebenso bei Dokumenten, die kein HTML sind (z.B. Gebührenordnungen als
+    PDF): Ihr Inhalt wird anhand des Content-Type gar nicht erst geladen.
+
+    Args:
+        url (str): Die zu ladende URL
+        session (requests.Session): Optionale Session (Verbindung wird wiederverwendet)
+
+    Returns:
+        str: URL und sichtbarer Seitentext
+    """
+    try:
+        # stream=True: der Body wird erst geladen, wenn es HTML ist
+        with (session or requests).get(
+            url, timeout=FETCH_TIMEOUT, headers={"User-Agent": USER_AGENT}, stream=True
+        ) as response:
+            response.raise_for_status()
+            content_type = response.headers.get("Content-Type", "").lower()
+            if "html" not in content_type:
+                return url
+            text = response.text
+    except requests.RequestException:
+        return url
+
+    selector = Selector(text=text)
+    parts = selector.xpath(
+        "//body//text()[not(ancestor::script) and not(ancestor::style) and not(ancestor::noscript)]"
+    ).getall()
+    return url + " " + " ".join(part.strip() for part in parts if part.strip())
+
+
+def fetch_host(urls, delay=FETCH_DELAY):
+    """
+    Lädt die Seiten eines Hosts nacheinander mit Pause zwischen den Requests.
+
+    Args:
+        urls (list): URLs desselben Hosts
+        delay (float): Pause zwischen zwei Requests in Sekunden
+
+    Returns:
+        dict: Zuordnung URL -> Text
+    """
+    texts = {}
+    with requests.Session() as session:
+        for i, url in enumerate(urls):
+            if i:
+                time.sleep(delay)
+            texts[url] = fetch_text(url, session)
+    return texts
+
+
+def fetch_texts(urls, workers=FETCH_WORKERS, delay=FETCH_DELAY):
+    """
+    Lädt mehrere Seiten, jede URL nur einmal.
+
+    Die URLs werden nach Host gruppiert: Verschiedene Hosts werden parallel
+    geladen, die Seiten eines Hosts nacheinander (siehe fetch_host).
+
+    Args:
+        urls (iterable): Die zu ladenden URLs
+        workers (int): Anzahl parallel geladener Hosts
+        delay (float): Pause zwischen zwei Requests an denselben Host
+
+    Returns:
+        dict: Zuordnung URL -> Text
+    """
+    by_host = {}
+    for url in dict.fromkeys(urls):
+        by_host.setdefault((urlparse(url).hostname or "").lower(), []).append(url)
+
+    texts = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for host_texts in executor.map(lambda host_urls: fetch_host(host_urls, delay), by_host.values()):
+            texts.update(host_texts)
+    return texts
+
+
+def bm25_scores(documents, stems=QUERY_STEMS, k1=BM25_K1, b=BM25_B):
+    """
+    Berechnet BM25-Scores aller Dokumente gegen die Anfrage in einem Durchgang.
+
+    Args:
+        documents (list): Dokumenttexte
+        stems (iterable): Wortstämme der Anfrage
+        k1 (float): Sättigung der Termhäufigkeit
+        b (float): Stärke der Längennormalisierung
+
+    Returns:
+        numpy.ndarray: Ein Score pro Dokument
+    """
+    if not documents:
+        return np.zeros(0)
+
+    # Term-Dokument-Matrix im CSR-Format aufbauen
+    vocabulary = {}
+    indices, indptr = [], [0]
+    for text in documents:
+        for token in tokenize(text):
+            indices.append(vocabulary.setdefault(token, len(vocabulary)))
+        indptr.append(len(indices))
+    data = np.ones(len(indices), dtype=np.float64)
+    tf = sparse.csr_matrix((data, indices, indptr), shape=(len(documents), len(vocabulary)))
+    tf.sum_duplicates()
+
+    # Anfragevektor: alle Terme, die einen der Stämme enthalten
+    terms = np.array(list(vocabulary), dtype=object)
+    query = np.fromiter((any(stem in term for stem in stems) for term in terms),
+                        dtype=bool, count=len(terms))
+    if not query.any():
+        return np.zeros(len(documents))
+    tf = tf[:, np.flatnonzero(query)].tocsr()
+
+    # IDF über alle Dokumente aller Bibliotheken
+    n_docs = len(documents)
+    df = np.bincount(tf.indices, minlength=tf.shape[1])
+    idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+
+    # BM25-Gewichtung der Termhäufigkeiten
+    doc_len = np.diff(indptr).astype(np.float64)
+    avg_len = doc_len.mean() or 1.0
+    norm = k1 * (1 - b + b * doc_len / avg_len)
+    rows = np.repeat(np.arange(n_docs), np.diff(tf.indptr))
+    tf.data = tf.data * (k1 + 1) / (tf.data + norm[rows]) * idf[tf.indices]
+    return np.asarray(tf.sum(axis=1)).ravel()
+
+
+def rank_libraries(entries, top_k=5, texts=None):
+    """
+    Reduziert matched_urls jeder Bibliothek auf die top_k relevantesten Seiten.
+
+    Args:
+        entries (list): Einträge aus urls.json mit 'source_url' und 'matched_urls'
+        top_k (int): Anzahl Seiten, die pro Bibliothek behalten werden
+        texts (dict): Optional bereits geladene Texte (URL -> Text); fehlende
+                      Seiten werden geladen
+
+    Returns:
+        list: Neue Einträge mit gekürzten, nach Score sortierten matched_urls
+    """
+    # Duplikate und Platzhalter ("keine gefunden") entfernen
+    url_lists = [
+        [url for url in dict.fromkeys(entry.get("matched_urls", [])) if url.startswith("http")]
+        for entry in entries
+    ]
+
+    texts = dict(texts or {})
+    missing = [url for urls in url_lists for url in urls if url not in texts]
+    texts.update(fetch_texts(missing))
+
+    # Alle Seiten aller Bibliotheken als ein Batch bewerten
+    documents = [texts[url] for urls in url_lists for url in urls]
+    scores = bm25_scores(documents)
+
+    ranked = []
+    offset = 0
+    for entry, urls in zip(entries, url_lists):
+        library_scores = scores[offset:offset + len(urls)]
+        offset += len(urls)
+        # Stabil absteigend sortieren, bei Gleichstand bleibt die Originalreihenfolge
+        order = np.argsort(-library_scores, kind="stable")[:top_k]
+        ranked.append({
+            "source_url": entry.get("source_url", ""),
+            "matched_urls": [urls[i] for i in order] or entry.get("matched_urls", []),
+        })
+    return ranked
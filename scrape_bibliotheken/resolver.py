@@ -0,0 +1,240 @@
+"""
+DNS-Resolver mit Negativ-Caching für das Scrape-Bibliotheken-Projekt.
+
+Der keyword_spider löst hunderte verschiedene Bibliotheks-Hosts auf, von
+denen ein Teil nicht mehr existiert. Scrapys Standard-Resolver
+(CachingThreadedResolver) cacht nur erfolgreiche Auflösungen, sodass jeder
+Request an einen toten Host erneut auf DNS_TIMEOUT wartet.
+
+Dieses Modul erweitert den Standard-Resolver um:
+- Negativ-Caching von Hosts, die es laut DNS nicht gibt (DNSCACHE_NEGATIVE_TTL);
+  Timeouts und vorübergehende Fehler werden nicht gecacht
+- Vorab-Auflösung (Pre-Warming) einer Host-Liste beim Spider-Start mit
+  begrenzter Parallelität (PREWARM_CONCURRENCY)
+- Zähler und Zeitmessung für jede Auflösung (dnsstats); gemessen wird im
+  Worker-Thread, Wartezeit im Thread-Pool zählt also nicht mit
+- Gemeinsame Auflösung: Fragen Pre-Warming und Requests gleichzeitig nach
+  demselben Host, läuft nur eine Auflösung im Thread-Pool
+
+Der Resolver wird von Scrapy prozessweit installiert und muss daher in
+settings.py (nicht in custom_settings eines Spiders) konfiguriert werden.
+
+Weitere Informationen:
+https://docs.scrapy.org/en/latest/topics/settings.html#dns-resolver
+"""
+
+import socket
+import time
+
+from twisted.internet import defer, threads
+from twisted.internet.error import DNSLookupError
+from scrapy.resolver import CachingThreadedResolver, dnscache
+from scrapy.utils.datatypes import LocalCache
+
+
+# Hosts, deren Auflösung fehlgeschlagen ist: Hostname -> Ablaufzeitpunkt (monotonic)
+negative_dnscache = LocalCache(10000)
+
+# Prozessweite Zähler, werden von der TransportStats-Extension in die Crawl-Stats übernommen
+dnsstats = {
+    "lookups": 0,
+    "cache_hits": 0,
+    "negative_hits": 0,
+    "resolved": 0,
+    "shared": 0,
+    "failures": 0,
+    "timeouts": 0,
+    "resolve_time": 0.0,
+}
+
+# getaddrinfo-Fehler, die "Host existiert nicht" bedeuten; nur diese werden
+# negativ gecacht (nicht z.B. EAI_AGAIN bei überlastetem DNS-Server)
+NEGATIVE_ERRNOS = {
+    errno for errno in (getattr(socket, "EAI_NONAME", None), getattr(socket, "EAI_NODATA", None))
+    if errno is not None
+}
+
+# Maximale Anzahl gleichzeitiger Vorab-Auflösungen; deutlich unter
+# REACTOR_THREADPOOL_MAXSIZE (Standard: 10), damit die Auflösungen nicht in
+# der Warteschlange des Thread-Pools ihren DNS_TIMEOUT aufbrauchen
+PREWARM_CONCURRENCY = 4
+
+
+def _lookup(name):
+    """
+    Löst einen Hostnamen im Worker-Thread auf und misst die Dauer.
+
+    Args:
+        name (str): Der aufzulösende Hostname
+
+    Returns:
+        tuple: (IP-Adresse oder None, Dauer in Sekunden, Fehler oder None)
+    """
+    start = time.monotonic()
+    try:
+        return socket.gethostbyname(name), time.monotonic() - start, None
+    except (OSError, UnicodeError) as error:
+        return None, time.monotonic() - start, error
+
+
+class NegativeCachingResolver(CachingThreadedResolver):
+    """
+    Caching-Resolver, der zusätzlich fehlgeschlagene Auflösungen cacht.
+
+    Erfolgreiche Auflösungen landen wie beim Standard-Resolver im gemeinsamen
+    dnscache von Scrapy. Hosts, die es laut DNS nicht gibt (NEGATIVE_ERRNOS),
+    werden für DNSCACHE_NEGATIVE_TTL Sekunden gemerkt und sofort mit einem
+    DNSLookupError beantwortet, ohne erneut auf DNS_TIMEOUT zu warten.
+
+    Läuft DNS_TIMEOUT ab, bekommt der Aufrufer einen DNSLookupError; die
+    Auflösung läuft im Worker-Thread aber weiter und füllt den Cache, sobald
+    sie fertig ist. Ein Timeout selbst wird nie negativ gecacht.
+    """
+
+    def __init__(self, reactor, cache_size, timeout, negative_ttl):
+        """
+        Initialisiert den Resolver.
+
+        Args:
+            reactor: Der Twisted-Reactor
+            cache_size (int): Maximale Anzahl gecachter Hostnamen (0 = kein Cache)
+            timeout (float): Timeout für eine einzelne DNS-Auflösung in Sekunden
+            negative_ttl (float): Gültigkeit eines Negativ-Eintrags in Sekunden
+                                  (0 = Negativ-Caching deaktiviert)
+        """
+        super().__init__(reactor, cache_size, timeout)
+        self.negative_ttl = negative_ttl
+        # Laufende Auflösungen: Hostname -> Liste der wartenden (Deferred, Timeout-Aufruf)
+        self.inflight = {}
+
+    @classmethod
+    def from_crawler(cls, crawler, reactor):
+        """
+        Factory-Methode zum Erstellen des Resolvers.
+
+        Args:
+            crawler: Die Scrapy-Crawler- bzw. CrawlerProcess-Instanz
+            reactor: Der Twisted-Reactor
+
+        Returns:
+            Eine neue Instanz des Resolvers
+        """
+        settings = crawler.settings
+        if settings.getbool("DNSCACHE_ENABLED"):
+            cache_size = settings.getint("DNSCACHE_SIZE")
+        else:
+            cache_size = 0
+        return cls(
+            reactor,
+            cache_size,
+            settings.getfloat("DNS_TIMEOUT"),
+            settings.getfloat("DNSCACHE_NEGATIVE_TTL", 3600),
+        )
+
+    def getHostByName(self, name, timeout=()):
+        """
+        Löst einen Hostnamen auf und nutzt dabei den positiven und negativen Cache.
+
+        Args:
+            name (str): Der aufzulösende Hostname
+            timeout: Wird ignoriert, es gilt DNS_TIMEOUT
+
+        Returns:
+            Deferred mit der IP-Adresse oder einem DNSLookupError
+        """
+        dnsstats["lookups"] += 1
+
+        if name in dnscache:
+            dnsstats["cache_hits"] += 1
+            return defer.succeed(dnscache[name])
+
+        expires = negative_dnscache.get(name)
+        if expires is not None:
+            if expires > time.monotonic():
+                dnsstats["negative_hits"] += 1
+                return defer.fail(DNSLookupError(f"{name} (negativ gecacht)"))
+            # Abgelaufener Eintrag: Host erneut auflösen
+            del negative_dnscache[name]
+
+        d = defer.Deferred()
+        timer = self.reactor.callLater(self.timeout, self._timeout, d, name)
+        waiters = self.inflight.get(name)
+        if waiters is not None:
+            # Host wird bereits aufgelöst: auf dieselbe Auflösung warten
+            dnsstats["shared"] += 1
+            waiters.append((d, timer))
+            return d
+
+        self.inflight[name] = [(d, timer)]
+        lookup = threads.deferToThreadPool(
+            self.reactor, self.reactor.getThreadPool(), _lookup, name
+        )
+        lookup.addCallback(self._lookup_done, name)
+        return d
+
+    def _timeout(self, d, name):
+        """Beantwortet eine Auflösung nach DNS_TIMEOUT mit einem Fehler (ohne Negativ-Cache)."""
+        dnsstats["timeouts"] += 1
+        d.errback(DNSLookupError(f"address {name!r} not found: timeout error"))
+
+    def _lookup_done(self, result, name):
+        """
+        Wertet eine abgeschlossene Auflösung aus dem Worker-Thread aus.
+
+        Beantwortet alle Aufrufer, die auf diesen Host warten und noch keinen
+        Timeout erhalten haben. Statistiken und Caches werden auch dann
+        aktualisiert, wenn alle Aufrufer bereits einen Timeout erhalten haben.
+
+        Args:
+            result (tuple): Rückgabe von _lookup
+            name (str): Der aufgelöste Hostname
+        """
+        address, duration, error = result
+        dnsstats["resolved"] += 1
+        dnsstats["resolve_time"] += duration
+
+        if error is None:
+            if dnscache.limit:
+                dnscache[name] = address
+        else:
+            dnsstats["failures"] += 1
+            if self.negative_ttl > 0 and getattr(error, "errno", None) in NEGATIVE_ERRNOS:
+                negative_dnscache[name] = time.monotonic() + self.negative_ttl
+
+        for d, timer in self.inflight.pop(name, []):
+            if not timer.active():
+                continue
+            timer.cancel()
+            if error is None:
+                d.callback(address)
+            else:
+                d.errback(DNSLookupError(f"address {name!r} not found: {error}"))
+
+
+def prewarm(hosts):
+    """
+    Startet die Auflösung einer Liste von Hostnamen im Hintergrund.
+
+    Die Auflösungen laufen über den installierten Resolver und füllen damit
+    den (positiven und negativen) DNS-Cache, bevor die eigentlichen Requests
+    die Hosts erreichen. Es laufen höchstens PREWARM_CONCURRENCY Auflösungen
+    gleichzeitig, damit der Thread-Pool für die Requests des Crawls frei
+    bleibt. Fehler werden hier verworfen.
+
+    Args:
+        hosts (iterable): Die aufzulösenden Hostnamen
+
+    Returns:
+        int: Anzahl der gestarteten Auflösungen
+    """
+    from twisted.internet import reactor
+
+    semaphore = defer.DeferredSemaphore(PREWARM_CONCURRENCY)
+    count = 0
+    for host in dict.fromkeys(hosts):
+        if not host or host in dnscache:
+            continue
+        d = semaphore.run(reactor.resolve, host)
+        d.addErrback(lambda failure: None)
+        count += 1
+    return count
@@ -0,0 +1,57 @@
+"""
+Scheduler für das Scrape-Bibliotheken-Projekt.
+
+Scrapy legt wartende Requests nur dann auf der Festplatte ab, wenn JOBDIR
+gesetzt ist; sonst liegen alle Requests im Speicher. Bei großen
+keyword_spider-Läufen wächst die Warteschlange damit ohne Grenze.
+
+Der DiskQueueScheduler verwendet immer eine Disk-Queue: bei gesetztem
+JOBDIR wie gewohnt dort (Pause/Fortsetzen bleibt möglich), sonst in einem
+temporären Verzeichnis, das beim Schließen des Spiders gelöscht wird.
+
+Weitere Informationen:
+https://docs.scrapy.org/en/latest/topics/scheduler.html
+"""
+
+import shutil
+import tempfile
+
+from scrapy.core.scheduler import Scheduler
+
+
+class DiskQueueScheduler(Scheduler):
+    """
+    Scheduler, der wartende Requests immer auf der Festplatte ablegt.
+
+    Nur Requests, die sich nicht serialisieren lassen (z.B. mit Lambda als
+    Callback), landen weiterhin in der Speicher-Queue (Stat:
+    scheduler/unserializable).
+    """
+
+    def _dqdir(self, jobdir):
+        """
+        Gibt das Verzeichnis der Disk-Queue zurück.
+
+        Args:
+            jobdir (str): JOBDIR oder None
+
+        Returns:
+            str: JOBDIR/requests.queue oder ein temporäres Verzeichnis
+        """
+        self._tempdir = None
+        if jobdir:
+            return super()._dqdir(jobdir)
+        self._tempdir = tempfile.mkdtemp(prefix="scrape_bibliotheken-queue-")
+        return self._tempdir
+
+    def close(self, reason):
+        """
+        Schließt die Queues und löscht ein temporäres Queue-Verzeichnis.
+
+        Args:
+            reason (str): Grund für das Schließen des Spiders
+        """
+        result = super().close(reason)
+        if self._tempdir:
+            shutil.rmtree(self._tempdir, ignore_errors=True)
+        return result
@@ -72,17 +72,67 @@ DOWNLOAD_DELAY = 1
 #    "scrape_bibliotheken.middlewares.ScrapeBibliothekenDownloaderMiddleware": 543,
 #}
 
+# Circuit-Breaker für tote Bibliotheks-Domains (siehe middlewares.py).
+# Die Middleware wird nur im keyword_spider aktiviert (custom_settings);
+# get_wikipedia spricht nur einen Host an und soll ihn nie aussortieren.
+CIRCUIT_BREAKER_ENABLED = True
+# Fehlschläge in Folge, ab denen alle weiteren Requests an den Host verworfen werden
+CIRCUIT_BREAKER_THRESHOLD = 2
+# Tote Hosts werden hier gespeichert und im nächsten Lauf nur kurz geprüft
+CIRCUIT_BREAKER_FILE = "dead_hosts.json"
+# Download-Timeout (Sekunden) für Probe-Requests an Hosts aus dem letzten Lauf
+CIRCUIT_BREAKER_PROBE_TIMEOUT = 5
+
 # Enable or disable extensions
 # See https://docs.scrapy.org/en/latest/topics/extensions.html
-#EXTENSIONS = {
-#    "scrapy.extensions.telnet.TelnetConsole": None,
-#}
+EXTENSIONS = {
+    # Misst DNS-Auflösung und Verbindungsaufbau pro Crawl (Stats: dns/*, transport/*)
+    "scrape_bibliotheken.extensions.TransportStats": 500,
+}
+
+# DNS-Auflösung
+# Gemeinsamer DNS-Cache mit Negativ-Caching toter Hosts (siehe resolver.py).
+# Der Resolver wird prozessweit installiert und kann daher nicht per
+# custom_settings eines Spiders gesetzt werden.
+TWISTED_DNS_RESOLVER = "scrape_bibliotheken.resolver.NegativeCachingResolver"
+# Ältere Scrapy-Versionen kennen nur DNS_RESOLVER (in neueren veraltet und mit Warnung)
+from scrapy.settings import default_settings as _scrapy_defaults  # noqa: E402
+if not hasattr(_scrapy_defaults, "TWISTED_DNS_RESOLVER"):
+    DNS_RESOLVER = TWISTED_DNS_RESOLVER
+DNSCACHE_ENABLED = True
+DNSCACHE_SIZE = 10000
+# Fehlgeschlagene Auflösungen werden 1 Stunde lang nicht wiederholt
+DNSCACHE_NEGATIVE_TTL = 3600
+# Kürzerer Timeout als der Scrapy-Standard (60s), damit tote Hosts schnell auffallen
+DNS_TIMEOUT = 10
+# Hosts aus start_urls beim Spider-Start vorab auflösen (im keyword_spider aktiviert)
+DNS_PREWARM_ENABLED = False
 
 # Configure item pipelines
 # See https://docs.scrapy.org/en/latest/topics/item-pipeline.html
-#ITEM_PIPELINES = {
-#    "scrape_bibliotheken.pipelines.ScrapeBibliothekenPipeline": 300,
-#}
+ITEM_PIPELINES = {
+    "scrape_bibliotheken.pipelines.ScrapeBibliothekenPipeline": 300,
+}
+
+# SQLite-Ergebnisdatenbank für alle Stufen (leer = deaktiviert), siehe store.py
+RESULTS_DB = "results.db"
+RESULTS_DB_BATCH_SIZE = 500
+# Crawl-ID (z.B. -s RESULTS_DB_CRAWL=2026-10): Läufe mit gleicher ID werden als
+# ein Crawl gelesen. Für verteilte Läufe (shard=i/n) Pflicht; gelesen wird pro Shard
+# der neueste Lauf dieser ID, und alle müssen abgeschlossen sein.
+RESULTS_DB_CRAWL = ""
+
+# Speicherbegrenzte Duplikaterkennung und Request-Warteschlange
+# Bloom-Filter statt Fingerprint-Set (siehe dupefilters.py, bloom.py)
+DUPEFILTER_CLASS = "scrape_bibliotheken.dupefilters.BloomDupeFilter"
+# Kapazität des ersten Teilfilters; weitere Teilfilter werden bei Bedarf angehängt
+BLOOM_DUPEFILTER_CAPACITY = 100000
+# Obergrenze für den Anteil neuer URLs, die fälschlich als Duplikat verworfen werden
+BLOOM_DUPEFILTER_ERROR_RATE = 0.0001
+# Wartende Requests immer auf der Festplatte ablegen, auch ohne JOBDIR (siehe scheduler.py)
+SCHEDULER = "scrape_bibliotheken.scheduler.DiskQueueScheduler"
+# Verteilt Requests nach Auslastung der Domains, empfohlen für Crawls über viele Domains
+SCHEDULER_PRIORITY_QUEUE = "scrapy.pqueues.DownloaderAwarePriorityQueue"
 
 # Enable and configure the AutoThrottle extension (disabled by default)
 # See https://docs.scrapy.org/en/latest/topics/autothrottle.html
@@ -0,0 +1,102 @@
+"""
+Hilfsfunktionen für verteilte (gesharte) Crawls.
+
+Für bundesweite Läufe kann der keyword_spider auf mehrere Maschinen bzw.
+Prozesse verteilt werden. Jeder Prozess bekommt das Spider-Argument
+shard=i/n und crawlt nur die Websites, deren Domain per stabilem Hash dem
+Shard i zugeordnet ist. Da alle URLs einer Domain im selben Shard landen,
+gelten CONCURRENT_REQUESTS_PER_DOMAIN und DOWNLOAD_DELAY weiterhin pro Domain.
+
+Die Ergebnisse der einzelnen Shards werden anschließend mit merge_shards.py
+zu einer urls.json zusammengeführt.
+"""
+
+import hashlib
+from urllib.parse import urlparse
+
+from w3lib.url import canonicalize_url
+
+
+def parse_shard(value):
+    """
+    Parst ein Shard-Argument der Form "i/n".
+
+    Args:
+        value (str): Shard-Angabe, z.B. "0/4" für den ersten von vier Shards
+
+    Returns:
+        tuple: (index, count) als Integer
+
+    Raises:
+        ValueError: Wenn die Angabe nicht dem Format "i/n" mit 0 <= i < n entspricht
+    """
+    try:
+        index, count = (int(part) for part in str(value).split("/"))
+    except ValueError:
+        raise ValueError(f"Invalid shard '{value}', expected 'i/n'.") from None
+
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Invalid shard '{value}', expected 0 <= i < n.")
+    return index, count
+
+
+def shard_for_url(url, count):
+    """
+    Bestimmt den Shard einer URL anhand eines stabilen Hashs ihres Hostnamens.
+
+    Python's eingebautes hash() ist pro Prozess randomisiert und daher
+    ungeeignet; SHA-1 liefert auf allen Maschinen dasselbe Ergebnis.
+
+    Args:
+        url (str): Die zu verteilende URL
+        count (int): Gesamtzahl der Shards
+
+    Returns:
+        int: Index des Shards (0 <= index < count)
+    """
+    host = (urlparse(url).hostname or "").lower()
+    digest = hashlib.sha1(host.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count
+
+
+def merge_results(shard_results, start_urls=()):
+    """
+    Führt die Ergebnisse mehrerer Shards zu einer Liste zusammen.
+
+    Einträge werden anhand der kanonischen source_url de-dupliziert (der
+    erste gewinnt, z.B. "https://x.de" vor "https://x.de/")
+    und in die Reihenfolge der ursprünglichen start_urls gebracht. Einträge,
+    deren source_url nicht in start_urls vorkommt (z.B. nach einer Umleitung),
+    folgen danach in der Reihenfolge der Shards. Doppelte URLs innerhalb von
+    matched_urls werden ebenfalls entfernt.
+
+    Args:
+        shard_results (iterable): Je Shard eine Liste von Dictionaries mit
+                                  'source_url' und 'matched_urls'
+        start_urls (iterable): Die ursprüngliche Reihenfolge der Websites
+
+    Returns:
+        list: Zusammengeführte Einträge
+    """
+    # Kanonische Form, damit z.B. "https://x.de" und "https://x.de/" übereinstimmen
+    order = {}
+    for url in start_urls:
+        order.setdefault(canonicalize_url(url), len(order))
+
+    merged = {}
+    for results in shard_results:
+        for entry in results:
+            source = entry.get("source_url")
+            key = canonicalize_url(source)
+            if key in merged:
+                continue
+            merged[key] = {
+                "source_url": source,
+                "matched_urls": list(dict.fromkeys(entry.get("matched_urls", []))),
+            }
+
+    # Bekannte URLs nach Position in start_urls, unbekannte stabil dahinter
+    return [
+        merged[key]
+        for key in sorted(merged, key=lambda key: order.get(key, len(order)))
+    ]
@@ -12,6 +12,14 @@ Output: JSON-Datei mit Bibliotheksinformationen (bibliotheken.json)
 
 import scrapy
 
+from scrape_bibliotheken.wikilinks import (
+    article_url,
+    extract_library_links,
+    legacy_links,
+    parse_redirects,
+    redirect_query_urls,
+)
+
 
 class get_wikipedia(scrapy.Spider):
     """
@@ -19,7 +27,8 @@ class get_wikipedia(scrapy.Spider):
     
     Dieser Spider:
     1. Startet auf der Wikipedia-Übersichtsseite für deutsche Stadtbibliotheken
-    2. Folgt Links zu einzelnen Bibliotheks-Artikeln
+    2. Folgt Links zu einzelnen Bibliotheks-Artikeln (strukturiert extrahiert,
+       ohne Duplikate und Nicht-Bibliotheksartikel, siehe wikilinks.py)
     3. Extrahiert die offizielle Website aus der Infobox jedes Artikels
     
     Ausgabefelder:
@@ -30,6 +39,10 @@ class get_wikipedia(scrapy.Spider):
     Custom Settings:
         - USER_AGENT: Simuliert einen modernen Chrome-Browser
         - ROBOTSTXT_OBEY: False (um alle Bibliotheksartikel zu erreichen)
+        - DOWNLOAD_HANDLERS: HTTP/2 für https (alle Requests gehen an
+          de.wikipedia.org und teilen sich eine multiplexte Verbindung)
+        - CONCURRENT_REQUESTS_PER_DOMAIN/DOWNLOAD_DELAY: Mehrere parallele
+          Streams auf dieser einen Verbindung statt streng sequenzieller Requests
     """
     name = "get_wikipedia"
     allowed_domains = ["de.wikipedia.org"]
@@ -42,45 +55,107 @@ class get_wikipedia(scrapy.Spider):
             "Chrome/127.0.0.1 Safari/537.36"
         ),
         "ROBOTSTXT_OBEY": False,
+        # HTTP/2 mit Verbindungswiederverwendung (benötigt Twisted[http2])
+        "DOWNLOAD_HANDLERS": {
+            "https": "scrapy.core.downloader.handlers.http2.H2DownloadHandler",
+        },
+        # Einige parallele Streams über dieselbe Verbindung, weiterhin höflich gedrosselt
+        "CONCURRENT_REQUESTS_PER_DOMAIN": 4,
+        "DOWNLOAD_DELAY": 0.25,
     }
 
+    def __init__(self, *args, **kwargs):
+        """
+        Initialisiert den Spider.
+        
+        Args:
+            *args: Weitere positionelle Argumente für den Spider
+            **kwargs: Weitere Keyword-Argumente für den Spider
+        """
+        super().__init__(*args, **kwargs)
+        # Bereits angefragte Artikeltitel (nach Auflösung von Weiterleitungen)
+        self.seen_titles = set()
+
     def parse(self, response):
         """
         Parst die Wikipedia-Übersichtsseite und folgt Links zu Bibliotheksartikeln.
         
-        Diese Methode extrahiert alle Links aus Listen-Elementen im Hauptinhalt
-        und filtert irrelevante Links heraus (Bearbeitungs-Links, rote Links, Listen).
+        Die Links werden strukturiert extrahiert (siehe wikilinks.py): pro
+        Listen-Eintrag bzw. Tabellenzeile nur die Bibliotheks-Links, ohne
+        Einzelnachweise, Sprungmarken, andere Namensräume und Duplikate.
+        Weiterleitungen werden gesammelt über die MediaWiki-API aufgelöst.
+        
+        Zum Vergleich wird in den Stats festgehalten, wie viele Artikel der
+        ursprüngliche Ansatz (jeder Link in "ul li") angefragt hätte.
         
         Args:
             response: HTTP-Response der Wikipedia-Übersichtsseite
             
         Yields:
-            scrapy.Request: Requests zu einzelnen Bibliotheks-Detailseiten
+            scrapy.Request: Requests zu Bibliotheks-Detailseiten und zur MediaWiki-API
         """
-        # Hauptinhalt der Wikipedia-Seite selektieren
-        container = response.css("#mw-content-text > div.mw-content-ltr.mw-parser-output")
-
-        for a in container.css("ul li a"):
-            href = a.attrib.get("href")
-            name = a.attrib.get("title")
+        links = extract_library_links(response)
+        self.crawler.stats.set_value("wikipedia/legacy_requests", len(legacy_links(response)))
 
-            if not href:
+        redirects = []
+        for link in links:
+            if link["redirect"]:
+                redirects.append(link)
                 continue
+            self.seen_titles.add(link["title"])
+            yield self._article_request(link["name"], link["url"])
 
-            # Relative URLs zu absoluten URLs umwandeln
-            if href.startswith("/"):
-                href = response.urljoin(href)
+        # Weiterleitungen gesammelt auflösen statt jede einzeln zu laden
+        for url, batch in redirect_query_urls([link["title"] for link in redirects]):
+            batch_links = [link for link in redirects if link["title"] in batch]
+            self.crawler.stats.inc_value("wikipedia/api_requests")
+            yield scrapy.Request(
+                url=url,
+                callback=self.parse_redirects,
+                cb_kwargs={"links": batch_links},
+            )
+
+    def parse_redirects(self, response, links):
+        """
+        Verarbeitet die MediaWiki-API-Antwort mit aufgelösten Weiterleitungen.
+        
+        Zeigt eine Weiterleitung auf einen Artikel, der bereits angefragt
+        wurde, wird sie übersprungen.
+        
+        Args:
+            response: JSON-Response der MediaWiki-API (action=query&redirects=1)
+            links (list): Die Weiterleitungs-Links dieses Batches
+            
+        Yields:
+            scrapy.Request: Requests zu den Zielartikeln
+        """
+        mapping = parse_redirects(response.json())
 
-            # Filter für irrelevante Links (Bearbeitungs-Links, nicht existierende Seiten, Listen)
-            if "action=edit" in href or "redlink=1" in href or "Liste" in href:
+        for link in links:
+            target = mapping.get(link["title"], link["title"])
+            if target in self.seen_titles:
+                self.crawler.stats.inc_value("wikipedia/redirect_duplicates")
                 continue
+            self.seen_titles.add(target)
+            yield self._article_request(link["name"], article_url(target))
 
-            # Folge dem Link zur Detailseite der Bibliothek
-            yield scrapy.Request(
-                url=href,
-                callback=self.parse_bibliothek,
-                meta={"name": name, "wikipedia_url": href},
-            )
+    def _article_request(self, name, url):
+        """
+        Erstellt den Request für eine Bibliotheks-Detailseite.
+        
+        Args:
+            name (str): Name der Bibliothek (Linktitel aus der Liste)
+            url (str): URL des Wikipedia-Artikels
+            
+        Returns:
+            scrapy.Request: Request mit parse_bibliothek als Callback
+        """
+        self.crawler.stats.inc_value("wikipedia/article_requests")
+        return scrapy.Request(
+            url=url,
+            callback=self.parse_bibliothek,
+            meta={"name": name, "wikipedia_url": url},
+        )
 
     def parse_bibliothek(self, response):
         """
@@ -119,3 +194,20 @@ class get_wikipedia(scrapy.Spider):
             "wikipedia_url": wikipedia_url,
             "website": website_url,
         }
+
+    def closed(self, reason):
+        """
+        Wird beim Schließen des Spiders aufgerufen und hält die Einsparung fest.
+        
+        Args:
+            reason (str): Grund für das Schließen des Spiders
+        """
+        stats = self.crawler.stats
+        legacy = stats.get_value("wikipedia/legacy_requests")
+        if legacy is None:
+            return
+        requests = (
+            stats.get_value("wikipedia/article_requests", 0)
+            + stats.get_value("wikipedia/api_requests", 0)
+        )
+        stats.set_value("wikipedia/requests_avoided", legacy - requests)
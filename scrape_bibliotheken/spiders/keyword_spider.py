@@ -1,9 +1,10 @@
 """
 Keyword-Spider zum Durchsuchen von Bibliothekswebseiten.
 
-Dieser Spider nimmt eine Liste von Bibliothekswebsites (aus bibliotheken.json)
-und durchsucht diese nach Links mit bestimmten Schlüsselwörtern im Linktext,
-die auf Anmelde- und Nutzungsinformationen hinweisen.
+Dieser Spider nimmt eine Liste von Bibliothekswebsites (aus bibliotheken.json
+oder dem letzten get_wikipedia-Lauf in results.db) und durchsucht diese nach
+Links mit bestimmten Schlüsselwörtern im Linktext, die auf Anmelde- und
+Nutzungsinformationen hinweisen.
 
 Keywords: faq, nutzung, ausleihe, anmeldung, mitglied, benutzung, ausweis
 
@@ -15,6 +16,9 @@ import json
 from urllib.parse import urljoin, urlparse
 import os
 
+from scrape_bibliotheken.sharding import parse_shard, shard_for_url
+from scrape_bibliotheken.store import ResultStore
+
 class KeywordSpider(scrapy.Spider):
     """
     Spider zum Durchsuchen von Bibliothekswebseiten nach relevanten Links.
@@ -37,6 +41,10 @@ class KeywordSpider(scrapy.Spider):
     Custom Settings:
         - USER_AGENT: Simuliert einen modernen Chrome-Browser
         - ROBOTSTXT_OBEY: False (um alle relevanten Seiten zu erreichen)
+        - DNS_PREWARM_ENABLED: Löst alle Hosts aus start_urls beim Start vorab auf
+          (der Negativ-Cache für tote Hosts ist in settings.py konfiguriert)
+        - DOWNLOAD_TIMEOUT: 20 Sekunden, damit tote Hosts schnell erkannt werden
+        - DOWNLOADER_MIDDLEWARES: CircuitBreakerMiddleware für tote Bibliotheks-Domains
     """
     name = "keyword_spider"
     
@@ -50,26 +58,43 @@ class KeywordSpider(scrapy.Spider):
             "Accept-Language": "de-DE,de;q=0.9,en-US;q=0.8,en;q=0.7",
         },
         "ROBOTSTXT_OBEY": False,
+        # Hunderte verschiedene Hosts: DNS-Cache beim Start vorwärmen
+        "DNS_PREWARM_ENABLED": True,
+        # Kurzer Timeout statt 180s: tote Hosts sollen schnell den Circuit-Breaker auslösen
+        "DOWNLOAD_TIMEOUT": 20,
+        # Nach RetryMiddleware (550) und RedirectMiddleware (600) eingehängt, damit
+        # jeder einzelne Fehlversuch und jede Umleitung gezählt wird
+        "DOWNLOADER_MIDDLEWARES": {
+            "scrape_bibliotheken.middlewares.CircuitBreakerMiddleware": 650,
+        },
     }
     
     # Keywords zum Suchen nach relevanten Informationen zu Anmeldung und Nutzung
     keywords = ["information", "service", "antworten", "antwort", "fragen", "frage", "faq", "nutzung", "ausleihe", "anmeldung", "mitglied", "benutzung", "ausweis"]
 
-    def __init__(self, config_file="bibliotheken.json", *args, **kwargs):
+    def __init__(self, config_file="bibliotheken.json", shard=None, *args, **kwargs):
         """
         Initialisiert den Spider mit einer Konfigurationsdatei.
         
         Lädt die Bibliothekswebsites aus der JSON-Datei und erstellt die
         Liste der zu crawlenden Start-URLs sowie erlaubten Domains.
+        Endet config_file auf ".db", werden die Websites aus dem letzten
+        get_wikipedia-Lauf der Ergebnisdatenbank gelesen (siehe store.py).
+        
+        Mit shard="i/n" crawlt der Spider nur den i-ten von n Teilen der
+        Websites (verteilt per stabilem Hash der Domain, siehe sharding.py).
         
         Args:
             config_file (str): Pfad zur JSON-Konfigurationsdatei mit Bibliotheksdaten
+                               oder zur Ergebnisdatenbank (*.db)
+            shard (str): Optionale Shard-Angabe "i/n", z.B. "0/4"
             *args: Weitere positionelle Argumente für den Spider
             **kwargs: Weitere Keyword-Argumente für den Spider
             
         Raises:
             FileNotFoundError: Wenn die Konfigurationsdatei nicht existiert
             ValueError: Wenn keine gültigen Start-URLs in der Konfiguration gefunden wurden
+                        oder die Shard-Angabe ungültig ist
         """
         super().__init__(*args, **kwargs)
 
@@ -77,18 +102,33 @@ class KeywordSpider(scrapy.Spider):
         if not os.path.exists(config_file):
             raise FileNotFoundError(f"Config file '{config_file}' not found.")
 
-        with open(config_file, "r", encoding="utf-8") as f:
-            config = json.load(f)
+        if config_file.endswith(".db"):
+            store = ResultStore(config_file)
+            config = store.libraries()
+            store.close()
+        else:
+            with open(config_file, "r", encoding="utf-8") as f:
+                config = json.load(f)
 
         # Extrahiere alle Website-URLs aus der Konfiguration
         self.start_urls = [entry["website"] for entry in config if "website" in entry]
         # Entferne null/None-Werte aus der Liste
         self.start_urls = [entry for entry in self.start_urls if entry]
+        # Bei verteiltem Crawl nur die Websites dieses Shards behalten
+        # (self.shard wird von der Pipeline im Lauf gespeichert)
+        self.shard = None
+        if shard is not None:
+            index, count = parse_shard(shard)
+            self.shard = f"{index}/{count}"
+            self.start_urls = [
+                url for url in self.start_urls if shard_for_url(url, count) == index
+            ]
         # Extrahiere Domains für allowed_domains (Sicherheitsmaßnahme)
         self.allowed_domains = [urlparse(url).netloc for url in self.start_urls]
 
 
-        if not self.start_urls:
+        # Ein leerer Shard ist erlaubt (z.B. mehr Shards als Domains)
+        if not self.start_urls and shard is None:
             raise ValueError("No start_urls found in config file.")
             
     def parse(self, response):
@@ -0,0 +1,531 @@
+"""
+SQLite-Ergebnisspeicher für alle Stufen des Workflows.
+
+Statt nur in flachen Dateien (bibliotheken.json, urls.json, libraries.md)
+landen die Ergebnisse jeder Stufe zusätzlich in einer lokalen
+SQLite-Datenbank (Standard: results.db). Jeder Lauf einer Stufe bekommt
+einen eigenen Eintrag in der Tabelle runs, sodass ältere Läufe erhalten
+bleiben und verglichen werden können.
+
+Ein Crawl besteht normalerweise aus einem Lauf. Bei einem verteilten Crawl
+(shard=i/n) schreibt jeder Shard einen eigenen Lauf; gelesen wird dann der
+ganze Crawl, d.h. der letzte abgeschlossene Lauf jedes Shards (bzw. alle
+Läufe mit derselben Crawl-ID, siehe RESULTS_DB_CRAWL). Als abgeschlossen
+gelten nur Läufe mit Status "finished"; abgebrochene Läufe behalten den
+Abschlussgrund von Scrapy (z.B. "shutdown") als Status.
+
+Tabellen:
+    runs:      Ein Eintrag pro Lauf (Stufe, Start, Ende, Status)
+    libraries: Bibliotheken aus get_wikipedia (Name, Wikipedia-URL, Website)
+    pages:     Gefundene URLs aus keyword_spider (eine Zeile pro URL)
+    analyses:  AI-Auswertungen aus parse_with_ai (Anmeldung, Kosten, Details)
+
+Alle Tabellen sind über die Spalte domain (Hostname ohne "www.")
+verknüpft und haben Indizes auf Domain, Bibliothek bzw. Quelle und Datum.
+
+Verwendung auf der Kommandozeile:
+    python -m scrape_bibliotheken.store runs
+    python -m scrape_bibliotheken.store fees --max-fee 10 --online
+    python -m scrape_bibliotheken.store diff keyword_spider
+"""
+
+import argparse
+import re
+import sqlite3
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+
+from scrape_bibliotheken.sharding import merge_results, parse_shard
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    stage TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    status TEXT NOT NULL DEFAULT 'running',
+    crawl TEXT,
+    shard TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_runs_stage ON runs (stage, id);
+
+CREATE TABLE IF NOT EXISTS libraries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    name TEXT,
+    wikipedia_url TEXT,
+    website TEXT,
+    domain TEXT,
+    crawled_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_libraries_run ON libraries (run_id);
+CREATE INDEX IF NOT EXISTS idx_libraries_domain ON libraries (domain);
+CREATE INDEX IF NOT EXISTS idx_libraries_name ON libraries (name);
+CREATE INDEX IF NOT EXISTS idx_libraries_crawled_at ON libraries (crawled_at);
+
+CREATE TABLE IF NOT EXISTS pages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    source_url TEXT NOT NULL,
+    domain TEXT,
+    url TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    crawled_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_pages_run ON pages (run_id);
+CREATE INDEX IF NOT EXISTS idx_pages_domain ON pages (domain);
+CREATE INDEX IF NOT EXISTS idx_pages_source ON pages (source_url);
+CREATE INDEX IF NOT EXISTS idx_pages_crawled_at ON pages (crawled_at);
+
+CREATE TABLE IF NOT EXISTS analyses (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    source_url TEXT NOT NULL,
+    domain TEXT,
+    registration TEXT,
+    fee_text TEXT,
+    fee_eur REAL,
+    details TEXT,
+    raw TEXT,
+    analyzed_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_analyses_run ON analyses (run_id);
+CREATE INDEX IF NOT EXISTS idx_analyses_domain ON analyses (domain);
+CREATE INDEX IF NOT EXISTS idx_analyses_analyzed_at ON analyses (analyzed_at);
+CREATE INDEX IF NOT EXISTS idx_analyses_fee ON analyses (registration, fee_eur);
+"""
+
+# Spalten, die in älteren Datenbanken nachträglich ergänzt werden
+RUN_COLUMNS = {"crawl": "TEXT", "shard": "TEXT"}
+
+# Spalten je Tabelle in der Reihenfolge der INSERT-Statements
+COLUMNS = {
+    "libraries": ("run_id", "name", "wikipedia_url", "website", "domain", "crawled_at"),
+    "pages": ("run_id", "source_url", "domain", "url", "position", "crawled_at"),
+    "analyses": ("run_id", "source_url", "domain", "registration", "fee_text",
+                 "fee_eur", "details", "raw", "analyzed_at"),
+}
+
+
+def domain_of(url):
+    """
+    Ermittelt die Domain einer URL als Verknüpfungsschlüssel.
+
+    Args:
+        url (str): Eine URL oder None
+
+    Returns:
+        str oder None: Hostname in Kleinbuchstaben ohne führendes "www."
+    """
+    if not url:
+        return None
+    host = (urlparse(url).hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    return host or None
+
+
+# Abschnitte der AI-Antwort (Format siehe Prompt in parse_with_ai.py)
+ANSWER_SECTIONS = re.compile(
+    r"(?P<key>Anmeldung Online oder Offline|Kosten des Bibliotheksausweis|Weitere Informationen)\s*:",
+    re.IGNORECASE,
+)
+FREE_RE = re.compile(r"kostenfrei|kostenlos|gebührenfrei|entgeltfrei|gratis", re.IGNORECASE)
+PRICE_RE = re.compile(r"(\d+(?:[.,]\d{1,2})?)\s*(?:€|euro|eur\b)", re.IGNORECASE)
+
+
+def parse_answer(text):
+    """
+    Zerlegt eine AI-Antwort in strukturierte Felder.
+
+    Args:
+        text (str): Antwort im Format des Prompts aus parse_with_ai.py oder None
+
+    Returns:
+        dict: 'registration' ("Online", "Offline", "keine Informationen" oder None),
+              'fee_text', 'fee_eur' (erster genannter Preis in Euro, 0.0 bei
+              kostenfrei, None wenn unbekannt) und 'details'
+    """
+    result = {"registration": None, "fee_text": None, "fee_eur": None, "details": None}
+    if not text:
+        return result
+
+    matches = list(ANSWER_SECTIONS.finditer(text))
+    sections = {}
+    for match, following in zip(matches, matches[1:] + [None]):
+        end = following.start() if following else len(text)
+        sections[match.group("key").lower()] = text[match.end():end].strip().strip('"').strip()
+
+    registration = sections.get("anmeldung online oder offline", "")
+    for value in ("keine Informationen", "Offline", "Online"):
+        if value.lower() in registration.lower():
+            result["registration"] = value
+            break
+
+    fee_text = sections.get("kosten des bibliotheksausweis")
+    if fee_text:
+        result["fee_text"] = fee_text
+        # Der zuerst genannte Preis ist meist die reguläre Jahresgebühr
+        price = PRICE_RE.search(fee_text)
+        if price:
+            result["fee_eur"] = float(price.group(1).replace(",", "."))
+        elif FREE_RE.search(fee_text):
+            result["fee_eur"] = 0.0
+
+    result["details"] = sections.get("weitere informationen") or None
+    return result
+
+
+def now():
+    """Gibt den aktuellen Zeitpunkt (UTC) als ISO-String zurück."""
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+class ResultStore:
+    """
+    Zugriff auf die SQLite-Ergebnisdatenbank.
+
+    Schreibzugriffe werden gesammelt und in einer Transaktion pro Batch
+    (executemany) geschrieben.
+    """
+
+    def __init__(self, path="results.db"):
+        """
+        Öffnet (und erstellt ggf.) die Datenbank.
+
+        Args:
+            path (str): Pfad zur SQLite-Datei
+        """
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        # WAL erlaubt Lesen während eines laufenden Crawls
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        """Ergänzt fehlende Spalten in Datenbanken älterer Versionen."""
+        existing = {row["name"] for row in self.conn.execute("PRAGMA table_info(runs)")}
+        with self.conn:
+            for column, column_type in RUN_COLUMNS.items():
+                if column not in existing:
+                    self.conn.execute(f"ALTER TABLE runs ADD COLUMN {column} {column_type}")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_runs_crawl ON runs (stage, crawl)")
+
+    def close(self):
+        """Schließt die Datenbankverbindung."""
+        self.conn.close()
+
+    def start_run(self, stage, crawl=None, shard=None):
+        """
+        Legt einen neuen Lauf an.
+
+        Args:
+            stage (str): Name der Stufe (z.B. "get_wikipedia", "keyword_spider", "parse_with_ai")
+            crawl (str): Optionale Crawl-ID, die mehrere Läufe zu einem Crawl verbindet
+            shard (str): Optionale Shard-Angabe "i/n" eines verteilten Crawls
+
+        Returns:
+            tuple: (run_id, Startzeitpunkt als ISO-String)
+        """
+        started_at = now()
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO runs (stage, started_at, crawl, shard) VALUES (?, ?, ?, ?)",
+                (stage, started_at, crawl, shard),
+            )
+        return cursor.lastrowid, started_at
+
+    def finish_run(self, run_id, status="finished"):
+        """
+        Markiert einen Lauf als beendet.
+
+        Args:
+            run_id (int): ID des Laufs
+            status (str): Abschlussstatus ("finished" oder Abbruchgrund)
+        """
+        with self.conn:
+            self.conn.execute(
+                "UPDATE runs SET finished_at = ?, status = ? WHERE id = ?",
+                (now(), status, run_id),
+            )
+
+    def insert(self, table, rows):
+        """
+        Schreibt mehrere Zeilen in einer Transaktion.
+
+        Args:
+            table (str): "libraries", "pages" oder "analyses"
+            rows (list): Tupel in der Spaltenreihenfolge aus COLUMNS
+        """
+        if not rows:
+            return
+        columns = COLUMNS[table]
+        sql = (
+            f"INSERT INTO {table} ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' for _ in columns)})"
+        )
+        with self.conn:
+            self.conn.executemany(sql, rows)
+
+    def latest_runs(self, stage, before=None):
+        """
+        Gibt die Läufe des letzten abgeschlossenen Crawls einer Stufe zurück.
+
+        Maßgeblich ist der letzte Lauf mit Status "finished":
+        - mit Shard-Angabe "i/n": pro Shard der neueste Lauf derselben
+          Crawl-ID; jeder davon muss abgeschlossen sein, damit nie Shards
+          verschiedener Crawls gemischt werden
+        - mit Crawl-ID: alle abgeschlossenen Läufe dieser Crawl-ID
+        - sonst nur dieser Lauf
+
+        Args:
+            stage (str): Name der Stufe
+            before (int): Nur Läufe mit kleinerer ID berücksichtigen (für Vergleiche)
+
+        Returns:
+            list: IDs der Läufe, aufsteigend (leer, wenn es keinen Lauf gibt)
+
+        Raises:
+            ValueError: Wenn im letzten verteilten Crawl ein Shard fehlt, noch
+                        läuft oder abgebrochen wurde, oder der Crawl keine Crawl-ID hat
+        """
+        sql = "SELECT id, crawl, shard, status FROM runs WHERE stage = ?"
+        params = [stage]
+        if before is not None:
+            sql += " AND id < ?"
+            params.append(before)
+        rows = self.conn.execute(sql + " ORDER BY id DESC", params).fetchall()
+        finished = [row for row in rows if row["status"] == "finished"]
+        if not finished:
+            return []
+
+        latest = finished[0]
+        if not latest["shard"]:
+            if latest["crawl"] is None:
+                return [latest["id"]]
+            return sorted(row["id"] for row in finished if row["crawl"] == latest["crawl"])
+        if latest["crawl"] is None:
+            raise ValueError(
+                f"Latest '{stage}' run is a shard without crawl id, "
+                "its shards cannot be told apart from other crawls."
+            )
+
+        _, count = parse_shard(latest["shard"])
+        newest = {}
+        for row in rows:
+            if row["crawl"] == latest["crawl"]:
+                newest.setdefault(row["shard"], row)
+        shards = [f"{index}/{count}" for index in range(count)]
+        missing = [shard for shard in shards if shard not in newest]
+        unfinished = [
+            f"{shard} ({newest[shard]['status'] or 'running'})"
+            for shard in shards
+            if shard in newest and newest[shard]["status"] != "finished"
+        ]
+        if missing or unfinished:
+            raise ValueError(
+                f"Latest '{stage}' crawl '{latest['crawl']}' is incomplete, "
+                f"missing shards: {', '.join(missing) or '-'}, "
+                f"unfinished shards: {', '.join(unfinished) or '-'}."
+            )
+        return sorted(newest[shard]["id"] for shard in shards)
+
+    def _resolve_runs(self, stage, run_id):
+        """Wandelt None (letzter Crawl), eine ID oder eine Liste von IDs in eine Liste um."""
+        if run_id is None:
+            return self.latest_runs(stage)
+        if isinstance(run_id, int):
+            return [run_id]
+        return list(run_id)
+
+    def runs(self):
+        """Gibt alle Läufe als Liste von Dictionaries zurück (neueste zuerst)."""
+        return [dict(row) for row in self.conn.execute("SELECT * FROM runs ORDER BY id DESC")]
+
+    def libraries(self, run_id=None):
+        """
+        Liest die Bibliotheken eines get_wikipedia-Crawls.
+
+        Args:
+            run_id (int oder list): ID(s) der Läufe (Standard: letzter abgeschlossener Crawl)
+
+        Returns:
+            list: Dictionaries mit 'name', 'wikipedia_url' und 'website'
+                  (gleiches Format wie bibliotheken.json)
+        """
+        run_ids = self._resolve_runs("get_wikipedia", run_id)
+        rows = self.conn.execute(
+            "SELECT name, wikipedia_url, website FROM libraries "
+            f"WHERE run_id IN ({', '.join('?' for _ in run_ids)}) ORDER BY run_id, id",
+            run_ids,
+        )
+        return [dict(row) for row in rows]
+
+    def matched_urls(self, run_id=None, start_urls=None):
+        """
+        Liest die gefundenen URLs eines keyword_spider-Crawls.
+
+        Bei einem verteilten Crawl werden die Läufe aller Shards gelesen und
+        wie in merge_shards.py zusammengeführt: de-dupliziert und in der
+        Reihenfolge der Bibliotheken.
+
+        Args:
+            run_id (int oder list): ID(s) der Läufe (Standard: letzter abgeschlossener Crawl)
+            start_urls (list): Websites in der gewünschten Reihenfolge (Standard:
+                               Websites des letzten get_wikipedia-Crawls)
+
+        Returns:
+            list: Dictionaries mit 'source_url' und 'matched_urls'
+                  (gleiches Format wie urls.json)
+        """
+        run_ids = self._resolve_runs("keyword_spider", run_id)
+        if start_urls is None:
+            start_urls = [library["website"] for library in self.libraries() if library["website"]]
+
+        runs = {}
+        rows = self.conn.execute(
+            "SELECT run_id, source_url, url FROM pages "
+            f"WHERE run_id IN ({', '.join('?' for _ in run_ids)}) ORDER BY run_id, id",
+            run_ids,
+        )
+        for row in rows:
+            runs.setdefault(row["run_id"], {}).setdefault(row["source_url"], []).append(row["url"])
+        results = [
+            [{"source_url": source, "matched_urls": urls} for source, urls in entries.items()]
+            for entries in runs.values()
+        ]
+        return merge_results(results, start_urls)
+
+    def libraries_by_fee(self, max_fee=None, online=False, run_id=None):
+        """
+        Sucht Bibliotheken nach Kosten und Anmeldeart.
+
+        Args:
+            max_fee (float): Höchstens diese Jahresgebühr in Euro (None = beliebig)
+            online (bool): Nur Bibliotheken mit Online-Anmeldung
+            run_id (int oder list): ID(s) der parse_with_ai-Läufe
+                                    (Standard: letzter abgeschlossener Lauf)
+
+        Returns:
+            list: Dictionaries mit Name, Website, Anmeldung und Kosten
+        """
+        run_ids = self._resolve_runs("parse_with_ai", run_id)
+        sql = f"""
+            SELECT a.source_url, a.registration, a.fee_eur, a.fee_text,
+                   (SELECT l.name FROM libraries l WHERE l.domain = a.domain
+                    ORDER BY l.id DESC LIMIT 1) AS name
+            FROM analyses a
+            WHERE a.run_id IN ({', '.join('?' for _ in run_ids)})
+        """
+        params = list(run_ids)
+        if max_fee is not None:
+            sql += " AND a.fee_eur IS NOT NULL AND a.fee_eur <= ?"
+            params.append(max_fee)
+        if online:
+            sql += " AND a.registration = 'Online'"
+        sql += " ORDER BY a.fee_eur, a.source_url"
+        return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def diff_runs(self, stage, old_run=None, new_run=None):
+        """
+        Vergleicht zwei Läufe bzw. Crawls derselben Stufe.
+
+        Verglichen werden bei get_wikipedia die Websites, bei keyword_spider
+        die gefundenen URLs und bei parse_with_ai die Kombination aus
+        Anmeldung und Kosten pro Website.
+
+        Args:
+            stage (str): Name der Stufe
+            old_run (int oder list): Älterer Lauf (Standard: vorletzter abgeschlossener Crawl)
+            new_run (int oder list): Neuerer Lauf (Standard: letzter abgeschlossener Crawl)
+
+        Returns:
+            dict: 'added' und 'removed' als sortierte Listen
+
+        Raises:
+            ValueError: Bei unbekannter Stufe oder wenn keine zwei Crawls existieren
+        """
+        queries = {
+            "get_wikipedia": "SELECT COALESCE(name, '') || ' | ' || COALESCE(website, '') FROM libraries",
+            "keyword_spider": "SELECT source_url || ' -> ' || url FROM pages",
+            "parse_with_ai": (
+                "SELECT source_url || ' | ' || COALESCE(registration, '') || ' | ' "
+                "|| COALESCE(fee_text, '') FROM analyses"
+            ),
+        }
+        if stage not in queries:
+            raise ValueError(f"Unknown stage '{stage}'.")
+
+        new_ids = self._resolve_runs(stage, new_run)
+        if old_run is None:
+            old_ids = self.latest_runs(stage, before=min(new_ids)) if new_ids else []
+        else:
+            old_ids = self._resolve_runs(stage, old_run)
+        if not old_ids or not new_ids:
+            raise ValueError(f"Need two finished crawls of '{stage}' to compare.")
+
+        def values(run_ids):
+            sql = f"{queries[stage]} WHERE run_id IN ({', '.join('?' for _ in run_ids)})"
+            return {row[0] for row in self.conn.execute(sql, run_ids)}
+
+        old, new = values(old_ids), values(new_ids)
+        return {"added": sorted(new - old), "removed": sorted(old - new)}
+
+
+def main(argv=None):
+    """Kommandozeilen-Einstiegspunkt für Abfragen auf der Ergebnisdatenbank."""
+    parser = argparse.ArgumentParser(description="Abfragen auf der Ergebnisdatenbank.")
+    parser.add_argument("--db", default="results.db", help="Pfad zur Datenbank (Standard: results.db)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("runs", help="Alle Läufe anzeigen")
+
+    fees = commands.add_parser("fees", help="Bibliotheken nach Kosten filtern")
+    fees.add_argument("--max-fee", type=float, help="Höchstens diese Gebühr in Euro")
+    fees.add_argument("--online", action="store_true", help="Nur mit Online-Anmeldung")
+
+    diff = commands.add_parser("diff", help="Zwei Läufe bzw. Crawls einer Stufe vergleichen")
+    diff.add_argument("stage", choices=["get_wikipedia", "keyword_spider", "parse_with_ai"])
+    diff.add_argument("old_run", nargs="?", type=int, help="Älterer Lauf (Standard: vorletzter Crawl)")
+    diff.add_argument("new_run", nargs="?", type=int, help="Neuerer Lauf (Standard: letzter Crawl)")
+
+    args = parser.parse_args(argv)
+    store = ResultStore(args.db)
+    try:
+        run_command(store, args)
+    except ValueError as e:
+        parser.error(str(e))
+    finally:
+        store.close()
+
+
+def run_command(store, args):
+    """
+    Führt ein Kommando der Kommandozeile aus.
+
+    Args:
+        store (ResultStore): Die geöffnete Datenbank
+        args: Die geparsten Argumente aus main()
+    """
+    if args.command == "runs":
+        for run in store.runs():
+            group = " ".join(filter(None, [run["crawl"], run["shard"] and f"shard={run['shard']}"]))
+            print(f"{run['id']:>4}  {run['stage']:<15} {run['started_at']}  {run['status']:<10} {group}")
+    elif args.command == "fees":
+        for row in store.libraries_by_fee(args.max_fee, args.online):
+            fee = "?" if row["fee_eur"] is None else f"{row['fee_eur']:.2f} €"
+            print(f"{fee:>9}  {row['registration'] or '?':<20} {row['name'] or ''}  {row['source_url']}")
+    elif args.command == "diff":
+        result = store.diff_runs(args.stage, args.old_run, args.new_run)
+        for line in result["added"]:
+            print(f"+ {line}")
+        for line in result["removed"]:
+            print(f"- {line}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,376 @@
+"""
+Link-Extraktion für die Wikipedia-Liste deutscher Stadtbibliotheken.
+
+Der get_wikipedia-Spider folgte ursprünglich jedem Link in einem
+Listen-Element des Hauptinhalts. Dadurch wurden auch Stadt- und
+Länderartikel, Einzelnachweise und mehrfach verlinkte Artikel geladen.
+
+Dieses Modul versteht den Aufbau der Liste (Listen-Einträge und
+Tabellenzeilen) und liefert pro Eintrag nur die Bibliotheks-Links:
+- Einzelnachweise, Bearbeiten-Links, Navigationsleisten usw. werden ignoriert
+- Reine Sprungmarken (#...) und Links in andere Namensräume (Datei:,
+  Kategorie:, Hilfe:, ...) werden übersprungen
+- Enthält ein Eintrag mehrere Links, werden nur die mit Bibliotheks-Begriff
+  im Titel verwendet (z.B. "Aachen: Stadtbibliothek Aachen")
+- Nennt ein Eintrag eine Bibliothek ohne eigenen Artikel (Rotlink oder
+  reiner Text, z.B. "Bamberg: Stadtbücherei Bamberg"), wird der Stadt-Link
+  nicht verwendet
+- Jeder Artikel wird nur einmal angefragt
+- Weiterleitungen (Klasse "mw-redirect") werden gesammelt über die
+  MediaWiki-API aufgelöst, damit Weiterleitung und Ziel nicht doppelt
+  geladen werden
+
+Verwendung mit einer gespeicherten Kopie der Listenseite:
+    python -m scrape_bibliotheken.wikilinks liste.html
+
+Gibt aus, wie viele Requests der alte und der neue Ansatz erzeugen.
+"""
+
+import math
+import sys
+from urllib.parse import quote, unquote, urldefrag, urlencode, urlparse
+
+from scrapy.http import HtmlResponse
+
+
+LIST_URL = "https://de.wikipedia.org/wiki/Liste_deutscher_Stadtbibliotheken"
+WIKI_BASE = "https://de.wikipedia.org"
+API_URL = "https://de.wikipedia.org/w/api.php"
+
+# Selektor für den Hauptinhalt der Wikipedia-Seite
+CONTENT_SELECTOR = "#mw-content-text > div.mw-content-ltr.mw-parser-output"
+
+# Maximale Anzahl Titel pro MediaWiki-API-Abfrage
+API_BATCH_SIZE = 50
+
+# Begriffe, an denen Bibliotheks-Links innerhalb eines Eintrags erkannt werden
+LIBRARY_KEYWORDS = (
+    "bibliothek", "bücherei", "bücherhalle", "mediathek", "mediothek", "library",
+)
+
+# Namensräume der deutschsprachigen Wikipedia, die keine Artikel enthalten
+NAMESPACES = {
+    "Benutzer", "Datei", "Bild", "Kategorie", "Vorlage", "Hilfe", "Wikipedia",
+    "Spezial", "Portal", "Modul", "MediaWiki", "Diskussion", "WP",
+    "File", "Image", "Category", "Template", "Help", "Special", "User",
+}
+
+# CSS-Klassen von Bereichen, deren Links nie Bibliotheksartikel sind
+NOISE_CLASSES = {
+    "reference", "references", "mw-editsection", "mw-cite-backlink",
+    "navbox", "NavFrame", "hatnote", "toc", "thumb", "sisterproject",
+}
+
+
+def _classes(element):
+    """Gibt die CSS-Klassen eines lxml-Elements als Menge zurück."""
+    return set((element.get("class") or "").split())
+
+
+def _in_noise(element):
+    """Prüft, ob ein Element in einem irrelevanten Bereich (z.B. Einzelnachweis) liegt."""
+    for ancestor in element.iterancestors():
+        if _classes(ancestor) & NOISE_CLASSES or ancestor.get("id") == "toc":
+            return True
+    return False
+
+
+def title_from_href(href):
+    """
+    Ermittelt den Artikeltitel aus einem internen Wikipedia-Link.
+
+    Args:
+        href (str): Link wie "/wiki/Stadtb%C3%BCcherei_Detmold#Geschichte"
+
+    Returns:
+        str: Titel mit Leerzeichen, ohne Sprungmarke (z.B. "Stadtbücherei Detmold"),
+             oder None, wenn es kein Artikel-Link ist
+    """
+    path, _ = urldefrag(href)
+    if not path.startswith("/wiki/"):
+        return None
+    title = unquote(path[len("/wiki/"):]).replace("_", " ").strip()
+    return title or None
+
+
+def article_url(title):
+    """
+    Baut die Artikel-URL zu einem Titel.
+
+    Args:
+        title (str): Artikeltitel, z.B. "Stadtbücherei Detmold"
+
+    Returns:
+        str: Absolute URL des Artikels
+    """
+    return f"{WIKI_BASE}/wiki/{quote(title.replace(' ', '_'), safe=':/(),!')}"
+
+
+def is_article_title(title):
+    """
+    Prüft, ob ein Titel zu einem Artikel (und nicht zu einem anderen Namensraum) gehört.
+
+    Args:
+        title (str): Artikeltitel
+
+    Returns:
+        bool: True für normale Artikel
+    """
+    prefix, sep, _ = title.partition(":")
+    if sep and (prefix in NAMESPACES or prefix.endswith("Diskussion")):
+        return False
+    return True
+
+
+def is_library_title(title):
+    """Prüft, ob ein Titel einen Bibliotheks-Begriff enthält."""
+    lowered = title.lower()
+    return any(keyword in lowered for keyword in LIBRARY_KEYWORDS)
+
+
+def legacy_links(response):
+    """
+    Liefert die Links, denen der ursprüngliche get_wikipedia.parse gefolgt ist.
+
+    Dient als Vergleichsbasis für die Anzahl eingesparter Requests. Links,
+    die sich nur in der Sprungmarke unterscheiden, zählen einmal, weil der
+    Scrapy-Dupefilter sie ebenfalls zusammenfasst. Links außerhalb von
+    de.wikipedia.org zählen nicht, weil Scrapy sie ohnehin verwirft.
+
+    Args:
+        response: HTTP-Response der Wikipedia-Übersichtsseite
+
+    Returns:
+        list: Eindeutige absolute URLs in Reihenfolge des Auftretens
+    """
+    container = response.css(CONTENT_SELECTOR)
+    urls = {}
+    for a in container.css("ul li a"):
+        href = a.attrib.get("href")
+        if not href:
+            continue
+        if href.startswith("/"):
+            href = response.urljoin(href)
+        if "action=edit" in href or "redlink=1" in href or "Liste" in href:
+            continue
+        if urlparse(href).hostname != urlparse(WIKI_BASE).hostname:
+            continue
+        urls.setdefault(urldefrag(href)[0], href)
+    return list(urls.values())
+
+
+def extract_library_links(response):
+    """
+    Extrahiert die Bibliotheks-Links aus der Wikipedia-Übersichtsseite.
+
+    Jeder Listen-Eintrag (ul > li) und jede Tabellenzeile (tr) wird als ein
+    Eintrag betrachtet. Pro Eintrag werden die gültigen Artikel-Links
+    gesammelt; gibt es darunter Links mit Bibliotheks-Begriff im Titel,
+    werden nur diese verwendet. Steht der Bibliotheks-Begriff nur im Text
+    des Eintrags (Bibliothek ohne Artikel, z.B. als Rotlink), sind die
+    übrigen Links Stadtartikel und werden verworfen. Nur Einträge ganz ohne
+    Bibliotheks-Begriff liefern alle Links. Gruppen-Überschriften (Einträge
+    mit verschachtelter Liste, z.B. Bundesländer) und Tabellenköpfe liefern
+    nur Links mit Bibliotheks-Begriff.
+
+    Args:
+        response: HTTP-Response der Wikipedia-Übersichtsseite
+
+    Returns:
+        list: Dictionaries mit 'name' (Linktitel), 'title' (Artikeltitel),
+              'url' (absolute URL inkl. Sprungmarke) und 'redirect' (bool),
+              eindeutig pro Artikeltitel
+    """
+    container = response.css(CONTENT_SELECTOR)
+    if not container:
+        return []
+    root = container[0].root
+
+    # Links nach ihrem nächsten Listen-Eintrag bzw. ihrer Tabellenzeile gruppieren
+    rows = {}
+    for a in root.iter("a"):
+        if _in_noise(a):
+            continue
+        row = next(a.iterancestors("li", "tr"), None)
+        if row is None:
+            continue
+        if row.tag == "li" and row.getparent() is not None and row.getparent().tag != "ul":
+            continue
+        rows.setdefault(row, []).append(a)
+
+    links = []
+    seen_titles = set()
+    for row, anchors in rows.items():
+        candidates = []
+        for a in anchors:
+            link = _parse_anchor(a, response)
+            if link:
+                candidates.append(link)
+
+        library_links = [link for link in candidates if is_library_title(link["name"])]
+        if library_links or _is_heading_row(row) or _names_library(row, anchors):
+            candidates = library_links
+        for link in candidates:
+            if link["title"] in seen_titles:
+                continue
+            seen_titles.add(link["title"])
+            links.append(link)
+    return links
+
+
+def _is_heading_row(row):
+    """
+    Prüft, ob ein Eintrag eine Gruppen-Überschrift ist.
+
+    Args:
+        row: lxml-Element des Listen-Eintrags (li) oder der Tabellenzeile (tr)
+
+    Returns:
+        bool: True für Einträge mit verschachtelter Liste und für Tabellenköpfe
+    """
+    if row.tag == "li":
+        return next(row.iterdescendants("li"), None) is not None
+    return next(row.iterchildren("td"), None) is None
+
+
+def _names_library(row, anchors):
+    """
+    Prüft, ob der Text eines Eintrags einen Bibliotheks-Begriff enthält.
+
+    Berücksichtigt den sichtbaren Text (ohne Einzelnachweise usw.) und die
+    Titel aller Links, auch von Rotlinks auf noch nicht angelegte Artikel.
+
+    Args:
+        row: lxml-Element des Listen-Eintrags (li) oder der Tabellenzeile (tr)
+        anchors (list): lxml-Elemente der Links des Eintrags (ohne irrelevante Bereiche)
+
+    Returns:
+        bool: True, wenn der Eintrag eine Bibliothek nennt
+    """
+    parts = [a.get("title") or "" for a in anchors]
+    parts.extend(_visible_text(row))
+    return is_library_title(" ".join(parts))
+
+
+def _visible_text(element):
+    """Liefert die Textstücke eines Elements ohne irrelevante Bereiche (NOISE_CLASSES)."""
+    if element.text:
+        yield element.text
+    for child in element:
+        # Kommentare haben keinen Tag-Namen (und keine Klassen)
+        if isinstance(child.tag, str) and not _classes(child) & NOISE_CLASSES:
+            yield from _visible_text(child)
+        if child.tail:
+            yield child.tail
+
+
+def _parse_anchor(a, response):
+    """
+    Prüft einen einzelnen Link und wandelt ihn in ein Link-Dictionary um.
+
+    Args:
+        a: lxml-Element des Links
+        response: Response der Übersichtsseite (für relative URLs)
+
+    Returns:
+        dict oder None: Link-Dictionary oder None für irrelevante Links
+    """
+    href = a.get("href")
+    if not href or href.startswith("#"):
+        return None
+
+    classes = _classes(a)
+    if "new" in classes or "external" in classes:
+        return None
+    if "action=edit" in href or "redlink=1" in href:
+        return None
+
+    title = title_from_href(href)
+    if not title or "Liste" in title or not is_article_title(title):
+        return None
+
+    return {
+        "name": a.get("title") or title,
+        "title": title,
+        "url": response.urljoin(href),
+        "redirect": "mw-redirect" in classes,
+    }
+
+
+def redirect_query_urls(titles):
+    """
+    Baut die MediaWiki-API-URLs zum Auflösen von Weiterleitungen.
+
+    Args:
+        titles (list): Titel der Weiterleitungsseiten
+
+    Returns:
+        list: Tupel (API-URL, Titel-Batch) mit höchstens API_BATCH_SIZE Titeln
+    """
+    batches = []
+    for start in range(0, len(titles), API_BATCH_SIZE):
+        batch = titles[start:start + API_BATCH_SIZE]
+        query = urlencode({
+            "action": "query",
+            "format": "json",
+            "redirects": 1,
+            "titles": "|".join(batch),
+        })
+        batches.append((f"{API_URL}?{query}", batch))
+    return batches
+
+
+def parse_redirects(data):
+    """
+    Liest die Weiterleitungsziele aus einer MediaWiki-API-Antwort.
+
+    Args:
+        data (dict): JSON-Antwort von action=query&redirects=1
+
+    Returns:
+        dict: Zuordnung Ausgangstitel -> Zieltitel
+    """
+    query = data.get("query", {})
+    normalized = {entry["from"]: entry["to"] for entry in query.get("normalized", [])}
+    redirects = {entry["from"]: entry["to"] for entry in query.get("redirects", [])}
+
+    mapping = {}
+    for title in set(normalized) | set(redirects):
+        target = normalized.get(title, title)
+        mapping[title] = redirects.get(target, target)
+    return mapping
+
+
+def main(argv=None):
+    """
+    Vergleicht alten und neuen Ansatz auf einer gespeicherten Listenseite.
+
+    Args:
+        argv (list): Kommandozeilenargumente (Standard: sys.argv[1:])
+
+    Returns:
+        int: Exit-Code
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 1:
+        print("Verwendung: python -m scrape_bibliotheken.wikilinks <liste.html>")
+        return 2
+
+    with open(argv[0], "rb") as f:
+        response = HtmlResponse(url=LIST_URL, body=f.read(), encoding="utf-8")
+
+    legacy = legacy_links(response)
+    links = extract_library_links(response)
+    redirects = [link for link in links if link["redirect"]]
+    api_requests = math.ceil(len(redirects) / API_BATCH_SIZE)
+    requests = len(links) + api_requests
+
+    print(f"Alter Ansatz:  {len(legacy)} Artikel-Requests")
+    print(f"Neuer Ansatz:  {len(links)} Artikel-Requests (höchstens), "
+          f"davon {len(redirects)} Weiterleitungen, + {api_requests} API-Requests")
+    print(f"Eingespart:    mindestens {len(legacy) - requests} Requests")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())